@@ -1,3 +1,12 @@
 # -*- coding: utf-8 -*-
+from odoo.tools import SQL
+
 from . import models
 from . import wizard
+
+
+def uninstall_hook(env):
+    # The ORM only drops the tables and views of removed models, not a materialized view
+    env.cr.execute(SQL(
+        "DROP MATERIALIZED VIEW IF EXISTS %s", SQL.identifier(env['vendor.support.report']._table),
+    ))
@@ -1,7 +1,7 @@
 {
     "name": "Vendor Supports Management",
     "summary": "Manage supports per supplier",
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.0.2",
     "category": "Purchases",
     "author": "DarbTech Labs",
     "license": "LGPL-3",
@@ -25,9 +25,15 @@
         "views/product_template_view.xml",
         "views/sale_order_view.xml",
         "views/account_form_view.xml",
+        "views/res_config_settings_views.xml",
+        "views/vendor_support_report_views.xml",
         "wizard/bc_client_view.xml",
         "wizard/min_buy_wizard_view.xml",
+        "wizard/support_product_import_view.xml",
+        "wizard/support_metric_import_view.xml",
+        "wizard/support_reprice_view.xml",
         "data/support_category_data.xml",
+        "data/ir_cron_data.xml",
     ],
     'assets': {
     'web.assets_backend': [
@@ -35,6 +41,7 @@
     ],
 },
 
+    "uninstall_hook": "uninstall_hook",
     "installable": True,
     "application": True
 }
\ No newline at end of file
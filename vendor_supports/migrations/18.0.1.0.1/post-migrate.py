@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Link historical purchase orders to their sale order, which used to be found through `origin` only."""
+    cr.execute("""
+        UPDATE purchase_order po
+           SET sale_id = so.id
+          FROM sale_order so
+         WHERE po.sale_id IS NULL
+           AND po.origin = so.name
+           AND po.company_id = so.company_id
+    """)
+    _logger.info("vendor_supports: linked %s purchase orders to their sale order", cr.rowcount)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Turn the media kit stored on each support into version 1 of its media kit history.
+
+    The filestore attachments are re-linked to the new records, not copied.
+    """
+    cr.execute("""
+        INSERT INTO vendor_support_media_kit
+               (support_id, version, filename, checksum, file_size, create_uid, create_date, write_uid, write_date)
+        SELECT att.res_id, 1, COALESCE(vs.media_kit_filename, att.name), att.checksum, att.file_size,
+               att.create_uid, att.create_date, att.write_uid, att.write_date
+          FROM ir_attachment att
+          JOIN vendor_support vs ON vs.id = att.res_id
+         WHERE att.res_model = 'vendor.support' AND att.res_field = 'media_kit'
+        RETURNING id, support_id
+    """)
+    kits = cr.fetchall()
+    for kit_id, support_id in kits:
+        cr.execute("""
+            UPDATE ir_attachment
+               SET res_model = 'vendor.support.media.kit', res_field = 'datas', res_id = %s
+             WHERE res_model = 'vendor.support' AND res_field = 'media_kit' AND res_id = %s
+        """, [kit_id, support_id])
+        cr.execute("UPDATE vendor_support SET current_media_kit_id = %s WHERE id = %s", [kit_id, support_id])
+    _logger.info("vendor_supports: migrated %s media kits to versioned attachments", len(kits))
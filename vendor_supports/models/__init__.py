@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 from . import vendor_support
+from . import vendor_support_metric
 from . import res_partner
 from . import purchase_order
 from . import product_supplierinfo
 from . import product_template
 from . import sale_order
+from . import sale_order_po_job
 from . import ir_actions_report
+from . import res_company
+from . import res_config_settings
+from . import vendor_support_report
+from . import vendor_support_perf
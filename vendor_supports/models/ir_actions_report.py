@@ -2,6 +2,8 @@
 from odoo import models, _
 from odoo.exceptions import UserError
 
+from .vendor_support_perf import instrument
+
 class IrActionsReport(models.Model):
     _inherit = 'ir.actions.report'
 
@@ -50,21 +52,19 @@ class IrActionsReport(models.Model):
         else:
             return super()._render_qweb_pdf(docids, data=data)
 
+    @instrument()
     def _guard_min_buy_before_print(self, docids):
-        """Block printing when a sale order is in min_buy OR draft/sent/to_validate/to_confirm and min-buy not met."""
+        """Block printing when a sale order is in min_buy OR draft and min-buy not met.
+
+        All orders are evaluated at once from their stored per-support totals.
+        """
         if not docids:
             return
-        orders = self.env['sale.order'].browse(docids)
+        report = self.env['sale.order'].browse(docids)._get_min_buy_print_report()
+        if not report:
+            return
+
         issues = []
-        for o in orders:
-            if o.state == 'min_buy':
-                issues.append(_("Commande %s est en état « Validation Min Buy » (min_buy).") % (o.name or o.id))
-                continue
-            if o.state =='draft':
-                try:
-                    o._check_support_min_buy_or_error()
-                except UserError as e:
-                    msg = e.args[0] if e.args else _("Minimum de commande non atteint.")
-                    issues.append(_("Commande %s : %s") % (o.name or o.id, msg))
-        if issues:
-            raise UserError(_("Impression bloquée :\n%s") % "\n".join(issues))
+        for entry in report.values():
+            issues.extend(_("Commande %s : %s") % (entry['name'], msg) for msg in entry['errors'])
+        raise UserError(_("Impression bloquée :\n%s") % "\n".join(issues))
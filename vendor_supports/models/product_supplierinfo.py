@@ -1,7 +1,74 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+from collections import defaultdict
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+from odoo.tools.sql import index_exists
+
+# Pricelist lines of a vendor that carry a support (per-vendor support index)
+VENDOR_SUPPORT_INDEX = "product_supplierinfo_partner_support_idx"
 
 class ProductSupplierinfo(models.Model):
     _inherit = 'product.supplierinfo'
 
-    support_id = fields.Many2one('vendor.support', string='Support')
+    support_id = fields.Many2one('vendor.support', string='Support', domain=[('blacklisted', '=', False)], index=True)
+
+    def init(self):
+        super().init()
+        if not index_exists(self.env.cr, VENDOR_SUPPORT_INDEX):
+            self.env.cr.execute(SQL(
+                "CREATE INDEX %s ON product_supplierinfo (partner_id, support_id) WHERE support_id IS NOT NULL",
+                SQL.identifier(VENDOR_SUPPORT_INDEX),
+            ))
+
+    @api.model
+    def _get_vendor_support_index(self, vendor_id):
+        """Supports available per product for a vendor, from its pricelists.
+
+        Returns {('product', variant id) or ('template', template id): frozenset(support ids)}.
+        Cached per registry and allowed companies, cleared whenever a pricelist line
+        carrying a support changes.
+        """
+        return self._read_vendor_support_index(vendor_id, tuple(sorted(self.env.companies.ids)))
+
+    @api.model
+    @tools.ormcache('vendor_id', 'company_ids')
+    def _read_vendor_support_index(self, vendor_id, company_ids):
+        index = defaultdict(set)
+        # the company rule of the pricelists, applied explicitly so that the result can be cached
+        infos = self.sudo().search_read(
+            [('partner_id', '=', vendor_id), ('support_id', '!=', False),
+             ('company_id', 'in', [False, *company_ids])],
+            ['product_id', 'product_tmpl_id', 'support_id'],
+        )
+        for si in infos:
+            if si['product_id']:
+                key = ('product', si['product_id'][0])
+            else:
+                key = ('template', si['product_tmpl_id'][0])
+            index[key].add(si['support_id'][0])
+        return {key: frozenset(support_ids) for key, support_ids in index.items()}
+
+    # Only pricelist lines carrying a support feed the support caches: the lines purchase
+    # adds to vendor pricelists on PO confirmation leave them untouched.
+    @api.model_create_multi
+    def create(self, vals_list):
+        infos = super().create(vals_list)
+        if any(vals.get('support_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return infos
+
+    def write(self, vals):
+        had_support = any(self.mapped('support_id'))
+        res = super().write(vals)
+        if {'support_id', 'product_tmpl_id', 'product_id', 'partner_id', 'company_id'}.intersection(vals) \
+                and (had_support or vals.get('support_id')):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        had_support = any(self.mapped('support_id'))
+        res = super().unlink()
+        if had_support:
+            self.env.registry.clear_cache()
+        return res
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError,UserError
+from odoo.tools import SQL
+from odoo.tools.sql import index_exists
 from datetime import date
+from collections import defaultdict
+
+# Active external products of a support, the products sold through vendor supports
+ACTIVE_EXTERNAL_PRODUCTS_INDEX = "product_template_active_external_support_idx"
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
@@ -11,7 +17,7 @@ class ProductTemplate(models.Model):
         ('external', 'Externe'),
         ('international', 'International'),
         ('adserving', 'AdServing'),
-    ], "Type")
+    ], "Type", index=True)
 
     public_price = fields.Float("Prix public unitaire")
     display_scope = fields.Selection([('desktop', 'Desktop'), ('mobile', 'Mobile'), ('multi', 'Multi-device')], "Affichage")
@@ -21,60 +27,215 @@ class ProductTemplate(models.Model):
     margin_pct = fields.Float("Commission (%)", compute='_compute_margin', store=False)
     standard_price = fields.Float(compute='_compute_cost_from_public',store=True,readonly=False,compute_sudo=True)
     sub_category = fields.Many2one("product.category","Sous-catégorie",domain=[('parent_id', '!=', False)])
-    support_id = fields.Many2one("vendor.support")
+    support_id = fields.Many2one("vendor.support", index=True)
 
-    @api.model
-    def create(self, vals):
-        support_id = vals.get('support_id') or self.env.context.get('default_support_id')
-        if support_id:
-            support = self.env['vendor.support'].browse(support_id).exists()
+    def init(self):
+        super().init()
+        if not index_exists(self.env.cr, ACTIVE_EXTERNAL_PRODUCTS_INDEX):
+            self.env.cr.execute(SQL(
+                "CREATE INDEX %s ON product_template (support_id) WHERE active AND product_kind = 'external'",
+                SQL.identifier(ACTIVE_EXTERNAL_PRODUCTS_INDEX),
+            ))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Supports and the premium category are resolved once for the whole batch
+        default_support_id = self.env.context.get('default_support_id')
+        support_ids = {vals.get('support_id') or default_support_id for vals in vals_list} - {False, None}
+        supports = {s.id: s for s in self.env['vendor.support'].browse(list(support_ids)).exists()}
+        premium = supports and self.env.ref('vendor_supports.product_category_premium')
+
+        for vals in vals_list:
+            support = supports.get(vals.get('support_id') or default_support_id)
             if support:
                 vals.setdefault('support_id', support.id)
-                vals['categ_id'] = self.env.ref('vendor_supports.product_category_premium').id
-                vals['list_price'] = vals['public_price']
+                vals['categ_id'] = premium.id
+                vals['list_price'] = vals.get('public_price', 0.0)
 
                 if not vals.get('seller_ids') and support.partner_id:
                     vals['seller_ids'] = [(0, 0, {
                         'partner_id': support.partner_id.id,
                         'support_id': support.id,
                     })]
-        return super().create(vals)
-    
+        return super().create(vals_list)
+
+    @api.model
+    def _import_support_products(self, rows, default_support=None, chunk_size=500, commit=False):
+        """Create support products from an iterable of {column: value} rows.
+
+        Supports and units are resolved once up front, products are created by chunks of
+        `chunk_size` (their vendor pricelists along with them) and, with `commit`, each
+        chunk is committed. A failing chunk is replayed row by row so that only the faulty
+        rows are rejected. Returns {'created': count, 'errors': [(row number, message)]}.
+        """
+        # support names are not unique: {name: [(support id, vendor name)]}
+        supports_by_name = defaultdict(list)
+        for s in self.env['vendor.support'].search_read([], ['name', 'partner_id']):
+            vendor = s['partner_id'][1].strip().lower() if s['partner_id'] else ''
+            supports_by_name[s['name'].strip().lower()].append((s['id'], vendor))
+        uoms_by_name = {
+            u['name'].strip().lower(): u['id']
+            for u in self.env['uom.uom'].search_read([], ['name'])
+        }
+
+        result = {'created': 0, 'errors': []}
+
+        def flush(chunk):
+            if not chunk:
+                return
+            try:
+                with self.env.cr.savepoint():
+                    self.create([vals for _row_number, vals in chunk])
+                result['created'] += len(chunk)
+            except Exception:
+                for row_number, vals in chunk:
+                    try:
+                        with self.env.cr.savepoint():
+                            self.create([vals])
+                        result['created'] += 1
+                    except Exception as e:
+                        result['errors'].append((row_number, str(e)))
+            if commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+
+        chunk = []
+        for row_number, row in enumerate(rows, start=2):
+            try:
+                vals = self._prepare_support_product_import_vals(row, supports_by_name, uoms_by_name, default_support)
+            except (ValueError, UserError) as e:
+                result['errors'].append((row_number, str(e)))
+                continue
+            chunk.append((row_number, vals))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        flush(chunk)
+        return result
+
+    @api.model
+    def _prepare_support_product_import_vals(self, row, supports_by_name, uoms_by_name, default_support=None):
+        row = {(key or '').strip().lower(): value for key, value in row.items()}
+
+        def text(key):
+            value = row.get(key)
+            return str(value).strip() if value not in (None, False) else ''
+
+        def number(key):
+            value = row.get(key)
+            if isinstance(value, (int, float)):
+                return float(value)
+            value = text(key).replace(' ', '').replace(',', '.')
+            return float(value) if value else 0.0
+
+        def day(key):
+            value = row.get(key)
+            if hasattr(value, 'date'):
+                return value.date()
+            return fields.Date.to_date(text(key)) if text(key) else False
+
+        name = text('name')
+        if not name:
+            raise UserError(_("Le nom du produit est obligatoire."))
+
+        support_id = default_support.id if default_support else False
+        if text('support'):
+            matches = supports_by_name.get(text('support').lower(), [])
+            if text('vendor'):
+                matches = [match for match in matches if match[1] == text('vendor').lower()]
+            if not matches:
+                raise UserError(_("Support inconnu : %s") % text('support'))
+            if len(matches) > 1:
+                raise UserError(_("Plusieurs supports s'appellent « %s » : indiquez leur fournisseur "
+                                  "dans la colonne vendor.") % text('support'))
+            support_id = matches[0][0]
+        if not support_id:
+            raise UserError(_("Aucun support pour le produit %s.") % name)
+
+        vals = {
+            'name': name,
+            'type': 'service',
+            'product_kind': text('product_kind') or 'external',
+            'support_id': support_id,
+            'public_price': number('public_price'),
+        }
+        if text('default_code'):
+            vals['default_code'] = text('default_code')
+        if text('uom'):
+            uom_id = uoms_by_name.get(text('uom').lower())
+            if not uom_id:
+                raise UserError(_("Unité inconnue : %s") % text('uom'))
+            vals['uom_id'] = vals['uom_po_id'] = uom_id
+        if text('display_scope'):
+            vals['display_scope'] = text('display_scope')
+        if day('valid_from'):
+            vals['valid_from'] = day('valid_from')
+        if day('valid_to'):
+            vals['valid_to'] = day('valid_to')
+        return vals
+
     def _determine_support_from_sellers(self):
         self.ensure_one()
-        for s in self.seller_ids:
-            if hasattr(s, 'support_id') and s.support_id:
-                return s.support_id
-        for s in self.seller_ids:
-            partner = getattr(s, 'partner_id', False)
-            if partner:
-                supp = self.env['vendor.support'].search([('partner_id', '=', partner.id)], limit=2)
-                if len(supp) == 1:
-                    return supp
-
-        return self.env['vendor.support']  
-    
+        return self._determine_supports_from_sellers()[self]
+
+    def _determine_supports_from_sellers(self):
+        """Support of each product of `self` deduced from its vendor pricelists.
+
+        A seller line carrying a support wins; otherwise the first seller partner having
+        exactly one support is used. Partners are resolved with one grouped query for
+        the whole recordset. Returns {product: support (possibly empty)}.
+        """
+        Support = self.env['vendor.support']
+        single_support = {}
+        partners = self.seller_ids.partner_id
+        if partners:
+            for partner, support_ids in Support._read_group(
+                [('partner_id', 'in', partners.ids)], ['partner_id'], ['id:array_agg']
+            ):
+                if len(support_ids) == 1:
+                    single_support[partner.id] = support_ids[0]
+
+        result = {}
+        for p in self:
+            support = next((s.support_id for s in p.seller_ids if s.support_id), Support)
+            if not support:
+                support_id = next(
+                    (single_support[s.partner_id.id] for s in p.seller_ids if s.partner_id.id in single_support),
+                    False,
+                )
+                support = Support.browse(support_id)
+            result[p] = support
+        return result
+
     @api.onchange('seller_ids')
     def _onchange_sync_support_with_sellers(self):
+        supports = self._determine_supports_from_sellers()
         for p in self:
             if not p.seller_ids:
                 p.support_id = False
             else:
-                new_support = p._determine_support_from_sellers()
+                new_support = supports[p]
                 if new_support:
                     p.support_id = new_support
 
     def write(self, vals):
         res = super().write(vals)
+        if 'active' in vals and any(self.seller_ids.mapped('support_id')):
+            # archived products leave the per-support allowed catalogs
+            self.env.registry.clear_cache()
         if 'seller_ids' in vals:
+            supports = self._determine_supports_from_sellers()
+            to_update = defaultdict(lambda: self.browse())
             for p in self:
                 if not p.seller_ids.support_id:
                     if p.support_id:
-                        p.with_context(allow_cost_write=True).write({'support_id': False})
+                        to_update[False] |= p
                 else:
-                    new_support = p._determine_support_from_sellers()
+                    new_support = supports[p]
                     if new_support and p.support_id != new_support:
-                        p.with_context(allow_cost_write=True).write({'support_id': new_support.id})
+                        to_update[new_support.id] |= p
+            # one write per target support
+            for support_id, products in to_update.items():
+                products.with_context(allow_cost_write=True).write({'support_id': support_id})
         return res
 
     @api.constrains('valid_from', 'valid_to')
@@ -88,7 +249,9 @@ class ProductTemplate(models.Model):
         for p in self:
             p.margin_pct = ((p.list_price or 0.0) and ((p.list_price - (p.standard_price or 0.0)) / (p.list_price or 1.0) * 100.0)) or 0.0
     
-    @api.depends('public_price', 'support_id', 'support_id.commission_pct')
+    # A change of the support commission reprices its products in bulk
+    # (vendor.support._reprice_products) rather than through this compute.
+    @api.depends('public_price', 'support_id')
     def _compute_cost_from_public(self):
         for t in self:
             if t.support_id:
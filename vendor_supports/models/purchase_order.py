@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models, _
 
+from .vendor_support_perf import instrument
+
 class PurchaseOrder(models.Model):
     _inherit = 'purchase.order'
 
     sale_id = fields.Many2one("sale.order", string="Source Sale Order", index=True)
+    origin = fields.Char(index=True)
 
 class PurchaseOrderLine(models.Model):
     _inherit = 'purchase.order.line'
@@ -12,7 +15,7 @@ class PurchaseOrderLine(models.Model):
     support_id = fields.Many2one(
         'vendor.support',
         string='Support',
-        domain="[('id', 'in', available_support_ids)]",
+        domain="[('id', 'in', available_support_ids), ('blacklisted', '=', False)]",
         help="Support linked to this product for the selected vendor."
     )
     available_support_ids = fields.Many2many(
@@ -26,8 +29,12 @@ class PurchaseOrderLine(models.Model):
     )
 
     @api.depends('product_id', 'order_id.partner_id')
+    @instrument()
     def _compute_available_supports(self):
-        """Restrict supports by both product (variant or template) and the PO vendor."""
+        """Restrict supports by both product (variant or template) and the PO vendor.
+
+        Reads the cached per-vendor index of `product.supplierinfo` instead of searching it.
+        """
         lines = self.filtered(lambda l: l.product_id and l.order_id.partner_id)
         others = self - lines
         for l in others:
@@ -38,33 +45,10 @@ class PurchaseOrderLine(models.Model):
             return
 
         SupplierInfo = self.env['product.supplierinfo']
-        prod_ids = lines.mapped('product_id').ids
-        tmpl_ids = lines.mapped('product_id.product_tmpl_id').ids
-        vendor_ids = lines.mapped('order_id.partner_id').ids
-
-        sis = SupplierInfo.search([
-            ('support_id', '!=', False),
-            ('partner_id', 'in', vendor_ids),
-            '|', ('product_id', 'in', prod_ids),
-                 ('product_tmpl_id', 'in', tmpl_ids),
-        ])
-
-        by_variant_vendor = {}
-        by_template_vendor = {}
-        for si in sis:
-            v_id = si.partner_id.id
-            if si.product_id:
-                key = (si.product_id.id, v_id)
-                by_variant_vendor.setdefault(key, set()).add(si.support_id.id)
-            else:
-                key = (si.product_tmpl_id.id, v_id)
-                by_template_vendor.setdefault(key, set()).add(si.support_id.id)
-
         for l in lines:
-            v_id = l.order_id.partner_id.id
-            s_ids = set()
-            s_ids |= set(by_variant_vendor.get((l.product_id.id, v_id), set()))
-            s_ids |= set(by_template_vendor.get((l.product_id.product_tmpl_id.id, v_id), set()))
+            index = SupplierInfo._get_vendor_support_index(l.order_id.partner_id.id)
+            s_ids = index.get(('product', l.product_id.id), frozenset()) \
+                | index.get(('template', l.product_id.product_tmpl_id.id), frozenset())
             l.available_support_ids = [(6, 0, list(s_ids))]
             l.has_available_supports = bool(s_ids)
 
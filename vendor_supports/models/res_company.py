@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+APPROVAL_THRESHOLD_FIELDS = {'approval_min_commission_pct', 'approval_max_amount'}
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    approval_min_commission_pct = fields.Float(
+        'Commission minimale sans approbation N+2', default=15.0,
+        help="Quotes having a paid line under this commission require the N+2 approval.")
+    approval_max_amount = fields.Monetary(
+        'Montant maximal sans approbation N+2', default=500000.0, currency_field='currency_id',
+        help="Quotes whose untaxed amount exceeds this amount require the N+2 approval.")
+
+    def write(self, vals):
+        res = super().write(vals)
+        if APPROVAL_THRESHOLD_FIELDS.intersection(vals):
+            # Open quotes are updated in bulk by the cron rather than recomputed one by one
+            self.env.ref('vendor_supports.ir_cron_recompute_approval_level')._trigger()
+        return res
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+from .vendor_support_perf import PERF_SAMPLE_RATE_PARAM
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    approval_min_commission_pct = fields.Float(
+        related='company_id.approval_min_commission_pct', readonly=False)
+    approval_max_amount = fields.Monetary(
+        related='company_id.approval_max_amount', readonly=False, currency_field='approval_currency_id')
+    approval_currency_id = fields.Many2one(related='company_id.currency_id')
+    vendor_supports_perf_sample_rate = fields.Float(
+        'Échantillonnage des mesures', config_parameter=PERF_SAMPLE_RATE_PARAM,
+        help="Share of the calls of the instrumented methods that are timed (0 disables the measures, 1 times every call).")
@@ -5,11 +5,18 @@ class ResPartner(models.Model):
     _inherit = 'res.partner'
 
     support_ids = fields.One2many('vendor.support', 'partner_id', string='Supports')
-    support_count = fields.Integer(compute='_compute_support_count', string='Supports')
+    support_count = fields.Integer(compute='_compute_support_count', string='Supports', store=True)
 
+    @api.depends('support_ids')
     def _compute_support_count(self):
+        # One grouped query for all records; stored so vendors can be sorted/filtered by it
+        groups = self.env['vendor.support'].read_group(
+            [('partner_id', 'in', self.ids)],
+            ['id'], ['partner_id']
+        )
+        counts = {g['partner_id'][0]: g['partner_id_count'] for g in groups}
         for partner in self:
-            partner.support_count = len(partner.support_ids)
+            partner.support_count = counts.get(partner.id, 0)
 
     def action_view_vendor_supports(self):
         self.ensure_one()
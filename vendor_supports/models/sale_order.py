@@ -1,9 +1,18 @@
 # -*- coding: utf-8 -*-
+import logging
+
+import psycopg2
+
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError,UserError
 from dateutil.relativedelta import relativedelta
 from collections import defaultdict
-from odoo.tools import float_round, float_is_zero, float_compare
+from odoo.tools import SQL, float_is_zero, float_compare, mute_logger
+from odoo.tools.sql import column_exists, index_exists
+
+from .vendor_support_perf import instrument
+
+_logger = logging.getLogger(__name__)
 
 SALE_ORDER_STATE = [
     ('draft', "Devis"),
@@ -19,9 +28,48 @@ GROUP_N1 = "vendor_supports.group_quote_approve_n1"
 GROUP_N2 = "vendor_supports.group_quote_approve_n2"
 MIN_BUY_GROUP_XMLID = "vendor_supports.group_min_buy_approver"
 
+# Partial unique index: at most one confirmed order per opportunity
+SINGLE_SALE_PER_OPPORTUNITY_INDEX = "sale_order_single_sale_per_opportunity_idx"
+
+# Lines of a support by state (open quote lines of a support)
+SUPPORT_LINE_STATE_INDEX = "sale_order_line_support_state_idx"
+
+# States in which the approval level of an order can still change
+OPEN_QUOTE_STATES = ('draft', 'sent', 'min_buy', 'to_validate', 'to_confirm')
+
+# System parameter: when set, purchase orders are generated by a cron after confirmation
+DEFERRED_PO_PARAM = "vendor_supports.deferred_po_generation"
+
+# Spacing used when an order has to be renumbered to make room for free lines
+FREE_LINE_SEQUENCE_STEP = 10
+
 class SaleOrder(models.Model):
     _inherit = "sale.order"
 
+    def init(self):
+        super().init()
+        cr = self.env.cr
+        if not column_exists(cr, 'sale_order', 'opportunity_id') \
+                or index_exists(cr, SINGLE_SALE_PER_OPPORTUNITY_INDEX):
+            return
+        cr.execute("""
+            SELECT opportunity_id FROM sale_order
+             WHERE state = 'sale' AND opportunity_id IS NOT NULL
+          GROUP BY opportunity_id
+            HAVING COUNT(*) > 1
+        """)
+        duplicates = [row[0] for row in cr.fetchall()]
+        if duplicates:
+            _logger.warning(
+                "Index %s not created: opportunities %s already have several confirmed orders.",
+                SINGLE_SALE_PER_OPPORTUNITY_INDEX, duplicates,
+            )
+            return
+        cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON sale_order (opportunity_id) WHERE state = 'sale' AND opportunity_id IS NOT NULL",
+            SQL.identifier(SINGLE_SALE_PER_OPPORTUNITY_INDEX),
+        ))
+
     def action_open_purchase_order(self):
         tree_id = self.env.ref("purchase.purchase_order_kpis_tree").id
         form_id = self.env.ref("purchase.purchase_order_form").id
@@ -30,15 +78,20 @@ class SaleOrder(models.Model):
             "view_mode": "list,form",
             'views': [(tree_id, 'list'),(form_id,'form')],
             "res_model": "purchase.order",
-            "domain":[('origin', '=', self.name)],
+            "domain":[('sale_id', 'in', self.ids)],
             "type": "ir.actions.act_window",
             "target": "current",
         }
 
     def _get_po(self):
-        for orders in self:
-            purchase_ids = self.env['purchase.order'].sudo().search([('origin', '=', self.name)])
-        orders.purchase_order_count = len(purchase_ids)
+        # One grouped query on the indexed sale_id link for the whole recordset
+        groups = self.env['purchase.order'].sudo().read_group(
+            [('sale_id', 'in', self.ids)],
+            ['id'], ['sale_id']
+        )
+        counts = {g['sale_id'][0]: g['sale_id_count'] for g in groups}
+        for order in self:
+            order.purchase_order_count = counts.get(order.id, 0)
 
     start_date = fields.Date("Date début")
     end_date = fields.Date("Date fin")
@@ -53,110 +106,239 @@ class SaleOrder(models.Model):
         tracking=3,
         default='draft')
 
+    # Only read by the min-buy check and the print guard: a Json column cannot be searched or
+    # grouped, per-support analysis goes through vendor.support.report. The amounts are
+    # converted at the rate of the order date when the lines last changed; a rate entered or
+    # corrected afterwards for that date is not applied until the order is recomputed.
+    support_totals = fields.Json(
+        string="Totaux par support", compute="_compute_support_totals", store=True,
+        help="Untaxed amount per support in company currency, as [support id, amount] pairs in line order. "
+             "Converted at the rate of the order date when the lines last changed: later rate "
+             "corrections are not reflected."
+    )
+    min_buy_status = fields.Selection(
+        [('none', 'Sans minimum'), ('reached', 'Atteint'), ('not_reached', 'Non atteint')],
+        string="Min Buy", compute="_compute_support_totals", store=True, index=True
+    )
+
+    po_job_ids = fields.One2many('sale.order.po.job', 'sale_id', string="Générations d'achats")
+    po_generation_state = fields.Selection(
+        [('pending', 'En attente'), ('done', 'Terminé'), ('failed', 'Échec')],
+        string="Génération des achats", compute="_compute_po_generation_state"
+    )
+
+    min_paid_commission_pct = fields.Float(
+        string="Commission minimale", compute="_compute_min_paid_commission_pct", store=True,
+        help="Lowest commission among the paid lines; 100 when the order has none."
+    )
     approval_required_level = fields.Selection(
         [('none', 'Aucune'), ('n1', 'Approbation N+1'), ('n2', 'Approbation N+1 & N+2')],
         string="Niveau d’approbation requis", compute="_compute_approval_required_level", store=True
     )
 
 
+    @instrument()
     def action_confirm(self):
+        """Confirm quotes, whatever the entry point (button, list action, RPC).
+
+        Drafts and sent quotes needing a N+1 approval only are confirmed directly. A quote
+        waiting for approval ('À valider' / 'À confirmer') is confirmed by its approver only:
+        the N+1 group for a N+1 quote, the N+2 group for a N+2 quote, which must be
+        'À confirmer'.
+        """
         for order in self:
-            if order.approval_required_level == 'n1' and order.state not in ('to_validate','draft','sent'):
+            if order.approval_required_level == 'n1' and order.state not in ('to_validate','to_confirm','draft','sent'):
                 raise UserError(_("Le devis doit être en état 'À valider' pour une confirmation N+1."))
             if order.approval_required_level == 'n2' and order.state != 'to_confirm':
                 raise UserError(_("Le devis doit être en état 'À confirmer' pour une confirmation N+2."))
-        res = super().action_confirm()
+        # Quotes waiting for approval are confirmed by their approver only, whatever the entry point
+        awaiting = self.filtered(lambda o: o.state in ('to_validate', 'to_confirm'))
+        if any(o.approval_required_level == 'n1' for o in awaiting):
+            self._require_group(GROUP_N1)
+        if any(o.approval_required_level == 'n2' for o in awaiting):
+            self._require_group(GROUP_N2)
+        try:
+            with self.env.cr.savepoint(), mute_logger('odoo.sql_db'):
+                res = super().action_confirm()
+                self.flush_recordset(['state'])
+        except psycopg2.errors.UniqueViolation as e:
+            if e.diag.constraint_name != SINGLE_SALE_PER_OPPORTUNITY_INDEX:
+                raise
+            raise ValidationError(_(
+                "Impossible de valider ce devis : un autre devis de l'opportunité '%s' "
+                "vient d'être validé. Veuillez recharger la page."
+            ) % ", ".join(self.opportunity_id.mapped('display_name'))) from None
+        if self._is_po_generation_deferred():
+            self.env['sale.order.po.job'].sudo()._enqueue(self)
+        else:
+            self._create_purchase_orders_from_so()
         for order in self:
-            order._create_purchase_orders_from_so()
             order.opportunity_id.action_set_won_rainbowman()
-            if len(order) == 1:
-                return {
-                    'name': _('Joindre le BC Client'),
-                    'type': 'ir.actions.act_window',
-                    'res_model': 'sale.client.po.wizard',
-                    'view_mode': 'form',
-                    'target': 'new',
-                    'context': {'default_sale_id': order.id},
-                }
+        if len(self) == 1:
+            return {
+                'name': _('Joindre le BC Client'),
+                'type': 'ir.actions.act_window',
+                'res_model': 'sale.client.po.wizard',
+                'view_mode': 'form',
+                'target': 'new',
+                'context': {'default_sale_id': self.id},
+            }
         return res
     
+    def _is_po_generation_deferred(self):
+        return bool(self.env['ir.config_parameter'].sudo().get_param(DEFERRED_PO_PARAM))
+
+    @api.depends('po_job_ids.state')
+    def _compute_po_generation_state(self):
+        for order in self:
+            last_job = order.po_job_ids.sorted('id')[-1:]
+            order.po_generation_state = last_job.state or False
+
+    def action_retry_po_generation(self):
+        self.po_job_ids.filtered(lambda j: j.state == 'failed').sudo().action_retry()
+        return True
+
     def action_set_to_draft(self):
         for o in self:
             o.write({'state': 'draft'})
 
     
+    @instrument()
     def action_approve(self):
-        self.ensure_one()
-        o = self
+        """Approve a selection of quotes waiting for approval.
 
-        if o.state not in ('to_validate', 'to_confirm'):
+        Rights are checked once for the whole selection, quotes needing a N+2 approval
+        move to 'À confirmer' with one write and the others are confirmed together.
+        """
+        if any(o.state not in ('to_validate', 'to_confirm') for o in self):
             raise UserError(_("Ce devis n’est pas en attente d’approbation."))
 
-        if o.state == 'to_validate':
-            o._require_group(GROUP_N1)
-
-            if o.approval_required_level == 'n1':
-                return o.action_confirm()
-            o.write({'state': 'to_confirm'})
-            o.message_post(body=_("Approbation N1 effectuée. Passage à l'approbation N2."))
-            return True
-
-        if o.state == 'to_confirm':
-            if o.approval_required_level == 'n1':
-                o._require_group(GROUP_N1)
-            else:
-                o._require_group(GROUP_N2)
-            return o.action_confirm()
-
-        raise UserError(_("État d’approbation non géré."))
+        needs_n2 = self.filtered(lambda o: o.state == 'to_confirm' and o.approval_required_level != 'n1')
+        if self - needs_n2:
+            self._require_group(GROUP_N1)
+        if needs_n2:
+            self._require_group(GROUP_N2)
+
+        to_n2 = self.filtered(lambda o: o.state == 'to_validate' and o.approval_required_level != 'n1')
+        if to_n2:
+            to_n2.write({'state': 'to_confirm'})
+            # message_post rather than a batched log note: followers are notified
+            for o in to_n2:
+                o.message_post(body=_("Approbation N1 effectuée. Passage à l'approbation N2."))
+
+        to_confirm = self - to_n2
+        if to_confirm:
+            return to_confirm.action_confirm()
+        return True
 
+    @instrument()
     def action_request_approval(self):
-        for o in self:
-            if o.state in ('draft', 'sent'):
-                errors = o._check_support_min_buy_or_error(raise_exception=False)
-                if errors:
-                    return o._open_min_buy_wizard(
-                        "Minimum de commande par support non atteint :\n" + "\n".join(errors)
-                    )
-                if o.approval_required_level == 'n1':
-                    o.write({'state': 'to_confirm'})
-                    o.message_post(body=_("Demande d’approbation (N1 uniquement)."))
-                else:
-                    o.write({'state': 'to_validate'})
-                    o.message_post(body=_("Demande d’approbation (N1 puis N2)."))
-                continue
-
-            if o.state == 'min_buy':
-                if self.env.user.has_group(MIN_BUY_GROUP_XMLID):
-                    next_state = 'to_confirm' if o.approval_required_level == 'n1' else 'to_validate'
-                    o.write({'state': next_state})
-                    continue
-                raise UserError(_("Cette commande est en 'Validation Min Buy'. "
-                                  "Seul un approbateur Min Buy peut la soumettre en 'À valider'."))
+        """Submit a selection of quotes for approval.
 
+        Quotes below a support's minimum buy do not stop the others: they are gathered
+        in a single min-buy wizard returned once the other quotes have been submitted.
+        """
+        if any(o.state not in ('draft', 'sent', 'min_buy') for o in self):
             raise UserError(_("Seuls les devis en brouillon/envoyés peuvent être soumis pour approbation."))
+        min_buy = self.filtered(lambda o: o.state == 'min_buy')
+        if min_buy and not self.env.user.has_group(MIN_BUY_GROUP_XMLID):
+            raise UserError(_("Cette commande est en 'Validation Min Buy'. "
+                              "Seul un approbateur Min Buy peut la soumettre en 'À valider'."))
+
+        drafts = self - min_buy
+        min_buy_errors = {}
+        for o in drafts:
+            errors = o._check_support_min_buy_or_error(raise_exception=False)
+            if errors:
+                min_buy_errors[o] = errors
+        blocked = self.browse([o.id for o in min_buy_errors])
+
+        submitted = self - blocked
+        n1_only = submitted.filtered(lambda o: o.approval_required_level == 'n1')
+        if n1_only:
+            n1_only.write({'state': 'to_confirm'})
+        if submitted - n1_only:
+            (submitted - n1_only).write({'state': 'to_validate'})
+
+        for o in drafts - blocked:
+            o.message_post(body=_("Demande d’approbation (N1 uniquement).") if o in n1_only
+                           else _("Demande d’approbation (N1 puis N2)."))
+
+        if blocked:
+            if len(blocked) == 1:
+                details = next(iter(min_buy_errors.values()))
+            else:
+                details = [
+                    f"{o.name} :\n" + "\n".join(f"  - {error}" for error in errors)
+                    for o, errors in min_buy_errors.items()
+                ]
+            return blocked._open_min_buy_wizard("Minimum de commande par support non atteint :\n" + "\n".join(details))
         return True
 
-    @api.depends(
-        "order_line.commission_pct",
-        "order_line.support_id", "order_line.support_id.commission_pct",
-        "amount_total",
-    )
-    def _compute_approval_required_level(self):
+    @api.depends("order_line.commission_pct", "order_line.product_uom_qty", "order_line.is_free_line")
+    def _compute_min_paid_commission_pct(self):
         for o in self:
             lines = o.order_line.filtered(lambda l: (l.product_uom_qty or 0.0) > 0.0 and not l.is_free_line)
+            o.min_paid_commission_pct = min((l.commission_pct or 0.0 for l in lines), default=100.0)
 
-            any_line_under_15 = any((l.commission_pct or 0.0) < 15.0 for l in lines)
-            over_budget = (o.amount_untaxed or 0.0) > 500000.0
-            if any_line_under_15 or over_budget:
+    # Company thresholds are deliberately not dependencies: changing them goes
+    # through _bulk_recompute_approval_level instead of an ORM recompute.
+    @api.depends("min_paid_commission_pct", "amount_untaxed")
+    def _compute_approval_required_level(self):
+        for o in self:
+            company = o.company_id or self.env.company
+            under_commission = o.min_paid_commission_pct < company.approval_min_commission_pct
+            over_budget = (o.amount_untaxed or 0.0) > company.approval_max_amount
+            if under_commission or over_budget:
                 o.approval_required_level = 'n2'
             else:
                 o.approval_required_level = 'n1'
 
+    @api.model
+    def _bulk_recompute_approval_level(self, company_ids=None, chunk_size=5000, commit=False):
+        """Recompute the approval level of all open quotes with set-based UPDATEs.
+
+        Orders are processed by chunks of `chunk_size` ids; with `commit`, each chunk is
+        committed on its own so that large recomputes do not hold long locks.
+        Returns the number of orders whose level changed.
+        """
+        self.flush_model(['min_paid_commission_pct', 'amount_untaxed', 'approval_required_level'])
+        domain = [('state', 'in', OPEN_QUOTE_STATES)]
+        if company_ids:
+            domain.append(('company_id', 'in', company_ids))
+        order_ids = self.search(domain, order='id').ids
+
+        level = SQL("""
+            CASE WHEN so.min_paid_commission_pct < c.approval_min_commission_pct
+                   OR so.amount_untaxed > c.approval_max_amount
+                 THEN 'n2' ELSE 'n1' END
+        """)
+        updated = 0
+        for start in range(0, len(order_ids), chunk_size):
+            self.env.cr.execute(SQL(
+                """
+                UPDATE sale_order so
+                   SET approval_required_level = %(level)s
+                  FROM res_company c
+                 WHERE c.id = so.company_id
+                   AND so.id = ANY(%(ids)s)
+                   AND so.approval_required_level IS DISTINCT FROM %(level)s
+                """,
+                level=level, ids=order_ids[start:start + chunk_size],
+            ))
+            updated += self.env.cr.rowcount
+            if commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+        self.invalidate_model(['approval_required_level'])
+        return updated
+
+    @api.model
+    def _cron_recompute_approval_level(self):
+        self._bulk_recompute_approval_level(commit=True)
+
     def _open_min_buy_wizard(self, errors_text):
-        self.ensure_one()
         wiz = self.env['sale.min.buy.wizard'].create({
-            'sale_id': self.id,
+            'sale_ids': [(6, 0, self.ids)],
             'errors_text': errors_text,
         })
         return {
@@ -174,30 +356,107 @@ class SaleOrder(models.Model):
         if not self.env.user.has_group(xmlid):
             raise UserError(_("Vous n’avez pas la permission d’effectuer cette approbation."))
 
-    def _check_support_min_buy_or_error(self, raise_exception=True):
-    
-        company = self.company_id or self.env.company
-        company_cur = company.currency_id
-
+    # No dependency on the supports' minimum buy amount: changing it would recompute every
+    # historical order. vendor.support.write recomputes the open quotes only.
+    @api.depends(
+        "order_line.price_subtotal", "order_line.support_id",
+        "currency_id", "company_id", "date_order",
+    )
+    @instrument()
+    def _compute_support_totals(self):
         for order in self:
-            cumuls = defaultdict(float)
+            company = order.company_id or self.env.company
+            subtotals = defaultdict(float)
             for line in order.order_line:
-                if not line.support_id:
-                    continue
-                amount_company = line.currency_id._convert(
-                    line.price_subtotal, company_cur, order.company_id,
+                if line.support_id:
+                    subtotals[line.support_id] += line.price_subtotal
+
+            # Lines share the order currency: one conversion per support
+            totals = []
+            for support, subtotal in subtotals.items():
+                amount_company = order.currency_id._convert(
+                    subtotal, company.currency_id, company,
                     order.date_order or fields.Date.context_today(order)
                 )
-                cumuls[line.support_id] += amount_company
-
-            errors = []
-            for support, subtotal in cumuls.items():
-                if support.minimum_buy_amount and subtotal <= support.minimum_buy_amount:
-                    errors.append(
-                        f"{support.display_name}: {company_cur.symbol} {subtotal:,.2f} "
-                        f"≤ {company_cur.symbol} {support.minimum_buy_amount:,.2f}".replace(',', ' ')
-                    )
+                totals.append([support.id, amount_company])
+
+            order.support_totals = totals
+            if not any(support.minimum_buy_amount for support in subtotals):
+                order.min_buy_status = 'none'
+            elif order._get_min_buy_errors(totals):
+                order.min_buy_status = 'not_reached'
+            else:
+                order.min_buy_status = 'reached'
+
+    def _recompute_support_totals(self):
+        """Recompute and store the min-buy status of `self`, e.g. after a support's minimum changed."""
+        self.env.add_to_compute(self._fields['min_buy_status'], self)
+        self.modified(['min_buy_status'])
+        self.flush_recordset(['support_totals', 'min_buy_status'])
+
+    def _get_min_buy_errors(self, totals=None):
+        """Human readable list of the supports whose minimum buy is not reached on this order."""
+        self.ensure_one()
+        company_cur = (self.company_id or self.env.company).currency_id
+        if totals is None:
+            totals = self.support_totals or []
+        supports = self.env['vendor.support'].browse([support_id for support_id, _amount in totals])
+
+        errors = []
+        for support, (_support_id, subtotal) in zip(supports, totals):
+            if support.minimum_buy_amount and subtotal <= support.minimum_buy_amount:
+                errors.append(
+                    f"{support.display_name}: {company_cur.symbol} {subtotal:,.2f} "
+                    f"≤ {company_cur.symbol} {support.minimum_buy_amount:,.2f}".replace(',', ' ')
+                )
+        return errors
+
+    def _get_min_buy_print_report(self):
+        """Orders of `self` that must not be printed because of the min-buy rules.
+
+        Returns {order id: {'name', 'state', 'errors'}} for the blocked orders only:
+        orders waiting for min-buy validation and drafts below a support's minimum.
+        """
+        drafts = self.filtered(lambda o: o.state == 'draft' and o.min_buy_status == 'not_reached')
+        # Warm the cache of all the supports involved in one query
+        self.env['vendor.support'].browse({
+            support_id for order in drafts for support_id, _amount in order.support_totals or []
+        }).mapped('minimum_buy_amount')
 
+        report = {}
+        for order in self:
+            if order.state == 'min_buy':
+                errors = [_("Commande en état « Validation Min Buy » (min_buy).")]
+            elif order in drafts:
+                errors = order._get_min_buy_errors()
+            else:
+                continue
+            if errors:
+                report[order.id] = {
+                    'name': order.name or order.id,
+                    'state': order.state,
+                    'errors': errors,
+                }
+        return report
+
+    def action_print_min_buy_valid(self):
+        """Print the quotations of `self` that pass the min-buy rules, leaving the others out.
+
+        The blocked orders are filtered here rather than in the report: the web client
+        only sends the ids of the records to print to /report/download.
+        """
+        blocked = self._get_min_buy_print_report()
+        valid = self.filtered(lambda o: o.id not in blocked)
+        if not valid:
+            raise UserError(_("Aucun devis imprimable : tous les devis sélectionnés sont bloqués par le Min Buy."))
+        return self.env.ref('sale.action_report_saleorder').report_action(valid)
+
+    def _check_support_min_buy_or_error(self, raise_exception=True):
+        """Check the stored per-support totals against the supports' minimum buy."""
+        for order in self:
+            if order.min_buy_status != 'not_reached':
+                continue
+            errors = order._get_min_buy_errors()
             if errors:
                 if raise_exception:
                     raise UserError("Minimum de commande par support non atteint :\n" + "\n".join(errors))
@@ -205,7 +464,6 @@ class SaleOrder(models.Model):
 
         return []
 
-    
     def _confirmation_error_message(self):
         self.ensure_one()
         if self.state not in {'draft', 'sent','to_validate','to_confirm'}:
@@ -220,91 +478,168 @@ class SaleOrder(models.Model):
 
         return False
 
+    @instrument()
     def _create_purchase_orders_from_so(self):
-        self.ensure_one()
+        """Generate and confirm the vendor purchase orders of all sale orders in `self`.
+
+        External products are grouped per sale order and vendor. Sellers are selected once
+        per distinct (product, vendor, qty, uom, date) key, then purchase orders and their
+        lines are created with one `create` per company and confirmed together.
+        """
         PurchaseOrder = self.env["purchase.order"]
         PurchaseOrderLine = self.env["purchase.order.line"]
 
-        grouped = {}
-        for line in self.order_line:
-            if not line.product_id:
-                continue
-            vendor, seller = self._get_vendor_and_seller_for_line(line)
+        lines = self.order_line.filtered(lambda l: l.product_id and l.product_id.product_kind == 'external')
+        # Prefetch the vendor pricelists of all products in one go
+        lines.product_id.seller_ids.mapped('partner_id')
+
+        seller_cache = {}
+        grouped = defaultdict(list)
+        for line in lines:
+            order = line.order_id
+            vendor, seller = order._get_vendor_and_seller_for_line(line, seller_cache)
             if not vendor:
                 continue
-            grouped.setdefault(vendor.id, []).append((line, seller))
+            grouped[(order, vendor)].append((line, seller))
 
         if not grouped:
-            return
+            return PurchaseOrder
 
-        created_pos = []
-        for partner_id, pairs in grouped.items():
-            if line.product_id.product_kind != 'external':
-                continue
-            
-            vendor = self.env["res.partner"].browse(partner_id)
-            po = PurchaseOrder.with_company(self.company_id).create({
+        by_company = defaultdict(list)
+        for order, vendor in grouped:
+            by_company[order.company_id].append((order, vendor))
+
+        date_planned = fields.Datetime.now()
+        taxes_cache = {}
+        purchase_orders = PurchaseOrder
+        for company, keys in by_company.items():
+            pos = PurchaseOrder.with_company(company).create([{
                 "partner_id": vendor.id,
-                "company_id": self.company_id.id,
-                "origin": self.name,
-                "sale_id": self.id,
-            })
-            for so_line, seller in pairs:
-                po_uom = (seller and seller.product_uom) or so_line.product_id.uom_po_id or so_line.product_uom
-                qty = so_line.product_uom._compute_quantity(so_line.product_uom_qty, po_uom)
-
-                taxes = so_line.product_id.supplier_taxes_id.filtered(lambda t: t.company_id == po.company_id)
-                date_planned = fields.Datetime.now()
-
-                PurchaseOrderLine.create({
-                    "order_id": po.id,
-                    "product_id": so_line.product_id.id,
-                    "support_id": so_line.support_id.id,
-                    "name": so_line.name or so_line.product_id.display_name,
-                    "product_qty": qty,
-                    "product_uom": po_uom.id,
-                    "price_unit": so_line.purchase_price,
-                    "date_planned": date_planned,
-                    "taxes_id": [(6, 0, taxes.ids)],
-                })
-            created_pos.append(po)
-            po.button_confirm()
-
-
-    def _get_vendor_and_seller_for_line(self, line):
+                "company_id": company.id,
+                "origin": order.name,
+                "sale_id": order.id,
+            } for order, vendor in keys])
+
+            line_vals_list = []
+            for po, key in zip(pos, keys):
+                for so_line, seller in grouped[key]:
+                    po_uom = (seller and seller.product_uom) or so_line.product_id.uom_po_id or so_line.product_uom
+                    qty = so_line.product_uom._compute_quantity(so_line.product_uom_qty, po_uom)
+
+                    taxes_key = (so_line.product_id, company)
+                    if taxes_key not in taxes_cache:
+                        taxes_cache[taxes_key] = so_line.product_id.supplier_taxes_id.filtered(
+                            lambda t: t.company_id == company
+                        )
+
+                    line_vals_list.append({
+                        "order_id": po.id,
+                        "product_id": so_line.product_id.id,
+                        "support_id": so_line.support_id.id,
+                        "name": so_line.name or so_line.product_id.display_name,
+                        "product_qty": qty,
+                        "product_uom": po_uom.id,
+                        "price_unit": so_line.purchase_price,
+                        "date_planned": date_planned,
+                        "taxes_id": [(6, 0, taxes_cache[taxes_key].ids)],
+                    })
+            PurchaseOrderLine.with_company(company).create(line_vals_list)
+            purchase_orders |= pos
+
+        purchase_orders.button_confirm()
+        return purchase_orders
+
+    def _get_vendor_and_seller_for_line(self, line, seller_cache=None):
         product = line.product_id
         vendor = getattr(product.product_tmpl_id, "vendor_id", False) or False
+        date = self.date_order or fields.Date.context_today(self)
 
-        seller = product._select_seller(
-            partner_id=vendor,
-            quantity=line.product_uom_qty,
-            date=self.date_order or fields.Date.context_today(self),
-            uom_id=line.product_uom,
-        )
+        key = (product.id, vendor and vendor.id, line.product_uom_qty, line.product_uom.id, date)
+        if seller_cache is not None and key in seller_cache:
+            seller = seller_cache[key]
+        else:
+            seller = product._select_seller(
+                partner_id=vendor,
+                quantity=line.product_uom_qty,
+                date=date,
+                uom_id=line.product_uom,
+            )
+            if seller_cache is not None:
+                seller_cache[key] = seller
         if not vendor:
             vendor = seller.partner_id if seller else False
         return vendor, seller
     
+    def _plan_free_line_sequences(self, slots, removed=()):
+        """Find a sequence for the free line of each (paid line, free line) pair of `slots`.
+
+        The free line may be an existing record or a ('new', index) key for a line still
+        to be created. A free line already sitting between its paid line and the next line
+        keeps its sequence; otherwise it takes the first value after the paid line. Only
+        when there is no gap left the order is renumbered, once, every line being spaced
+        by FREE_LINE_SEQUENCE_STEP. Lines in `removed` are ignored.
+
+        Returns a {line or key: sequence} mapping of the values to apply.
+        """
+        self.ensure_one()
+        placed = dict(slots)
+        moving = {free for free in placed.values() if not isinstance(free, tuple)}
+        layout = [
+            l for l in sorted(self.order_line, key=lambda l: int(l.sequence or 0))
+            if l not in moving and l not in removed
+        ]
+        position = {l: i for i, l in enumerate(layout)}
+
+        result = {}
+        for paid, free in slots:
+            i = position.get(paid, len(layout))
+            low = int(paid.sequence or 0)
+            high = int(layout[i + 1].sequence or 0) if i + 1 < len(layout) else None
+            if free in moving:
+                current = int(free.sequence or 0)
+                if low < current and (high is None or current < high):
+                    continue
+            if high is not None and high - low < 2:
+                return self._plan_order_renumbering(layout, placed)
+            result[free] = low + 1
+        return result
+
+    def _plan_order_renumbering(self, layout, placed):
+        """Renumber `layout`, each free line of `placed` following its paid line."""
+        result = {}
+        sequence = 0
+        for line in layout:
+            sequence += FREE_LINE_SEQUENCE_STEP
+            if int(line.sequence or 0) != sequence:
+                result[line] = sequence
+            if line in placed:
+                sequence += FREE_LINE_SEQUENCE_STEP
+                result[placed[line]] = sequence
+        return result
+
     @api.constrains('state', 'opportunity_id')
     def _check_single_validated_quote_per_opportunity(self):
-        for order in self:
-            if order.state == 'sale' and order.opportunity_id:
-                confirmed_orders = self.env['sale.order'].search_count([
-                    ('id', '!=', order.id),
-                    ('opportunity_id', '=', order.opportunity_id.id),
-                    ('state', '=', 'sale')
-                ])
-                if confirmed_orders:
-                    raise ValidationError(_(
-                        "Impossible de valider ce devis : "
-                        "l'opportunité '%s' possède déjà un devis validé."
-                    ) % order.opportunity_id.display_name)
+        # Pre-check only: the partial unique index is what guards against concurrent confirmations
+        confirmed = self.filtered(lambda o: o.state == 'sale' and o.opportunity_id)
+        if not confirmed:
+            return
+        groups = self.env['sale.order'].read_group(
+            [('opportunity_id', 'in', confirmed.opportunity_id.ids), ('state', '=', 'sale')],
+            ['id'], ['opportunity_id']
+        )
+        for g in groups:
+            if g['opportunity_id_count'] > 1:
+                raise ValidationError(_(
+                    "Impossible de valider ce devis : "
+                    "l'opportunité '%s' possède déjà un devis validé."
+                ) % g['opportunity_id'][1])
 
 
 class SaleOrderLine(models.Model):
     _inherit = 'sale.order.line'
 
-    support_id = fields.Many2one('vendor.support',string='Support',help="Support available for the selected product.")
+    support_id = fields.Many2one('vendor.support', string='Support', domain=[('blacklisted', '=', False)],
+                                 index=True, help="Support available for the selected product.")
     commission_pct = fields.Float('Commission',compute='_compute_commission_pct',store=True,)
     public_price = fields.Float(
     related='product_id.product_tmpl_id.public_price',
@@ -324,58 +659,38 @@ class SaleOrderLine(models.Model):
         ondelete='cascade',
         index=True,
     )
-    allowed_product_ids = fields.Many2many(
-        'product.product', compute='_compute_allowed_products', store=False)
-    allowed_product_tmpl_ids = fields.Many2many(
-        'product.template', compute='_compute_allowed_products', store=False)
-
-    @api.depends('support_id')
-    def _compute_allowed_products(self):
-        ProductT = self.env['product.template']
-        ProductP = self.env['product.product']
 
-        for line in self:
-            if line.support_id:
-                # with support -> only products linked to that support
-                tmpl_ids = ProductT.search([
-                    ('seller_ids.support_id', '=', line.support_id.id)
-                ]).ids
-            else:
-                # no support -> all products except kind 'external'
-                tmpl_ids = ProductT.search([
-                    ('product_kind', '!=', 'external')
-                ]).ids
+    def init(self):
+        super().init()
+        if not index_exists(self.env.cr, SUPPORT_LINE_STATE_INDEX):
+            self.env.cr.execute(SQL(
+                "CREATE INDEX %s ON sale_order_line (support_id, state) WHERE support_id IS NOT NULL",
+                SQL.identifier(SUPPORT_LINE_STATE_INDEX),
+            ))
 
-            # set computed lists
-            line.allowed_product_tmpl_ids = [(6, 0, tmpl_ids)]
-            prod_ids = ProductP.search([('product_tmpl_id', 'in', tmpl_ids)]).ids
-            line.allowed_product_ids = [(6, 0, prod_ids)]
+    @api.onchange('support_id')
+    def _onchange_support_id_allowed_products(self):
+        """Drop the product when it cannot be sold through the selected support.
 
-            if line.product_id and line.product_id.id not in prod_ids:
-                line.product_id = False
-            if hasattr(line, 'product_template_id') and line.product_template_id and \
-               line.product_template_id.id not in tmpl_ids:
+        The product picker itself is filtered server-side by the view domain.
+        """
+        for line in self:
+            if line.product_template_id and not line._is_allowed_product_template(line.product_template_id):
                 line.product_template_id = False
+            if line.product_id and not line._is_allowed_product_template(line.product_id.product_tmpl_id):
+                line.product_id = False
 
-    def _ensure_slot_after_line(self):
-        """
-        Make sure there is a free sequence slot right after `self.sequence`.
-        Bumps later lines by +1 so we can insert at self.sequence + 1.
-        """
+    @instrument()
+    def _is_allowed_product_template(self, template):
+        """With a support, only products linked to it; without, all products except 'external' ones."""
         self.ensure_one()
-        order = self.order_id
-        base = int(self.sequence or 0)
-
-        # Lines to shift: any non-display line with sequence >= base+1 (except our own free line)
-        lines_to_shift = order.order_line.filtered(
-            lambda l: not l.display_type and not l.is_free_line and l.id != self.id and int(l.sequence or 0) >= base + 1
-        )
-        if lines_to_shift:
-            # Shift in one write for performance
-            for l in lines_to_shift:
-                l.sequence = int(l.sequence or 0) + 1
+        if self.support_id:
+            allowed_ids = self.env['vendor.support']._get_allowed_template_ids(self.support_id._origin.id)
+            return template._origin.id in allowed_ids
+        return template.product_kind != 'external'
 
     @api.onchange('product_id', 'product_uom_qty', 'support_id')
+    @instrument()
     def _onchange_support_free_services(self):
         if self.env.context.get('no_free_goods'):
             return
@@ -410,22 +725,120 @@ class SaleOrderLine(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         lines = super().create(vals_list)
-        ctx = dict(self.env.context, no_free_goods=True)
-        for line in lines.with_context(ctx):
-            if not line.display_type and not line.is_free_line:
-                line._apply_or_cleanup_free_services_from_support()
+        lines.with_context(no_free_goods=True)._sync_free_lines()
         return lines
 
     def write(self, vals):
         res = super().write(vals)
         watch = {'product_id', 'product_uom_qty', 'support_id', 'is_free_line'}
         if watch.intersection(vals.keys()):
-            ctx = dict(self.env.context, no_free_goods=True)
-            for line in self.with_context(ctx):
-                if not line.display_type and not line.is_free_line:
-                    line._apply_or_cleanup_free_services_from_support()
+            self.with_context(no_free_goods=True)._sync_free_lines()
         return res
-    
+
+    @instrument()
+    def _sync_free_lines(self):
+        """Create/update/remove the free service lines of all paid lines in `self` at once.
+
+        The desired free lines are built in memory order by order, then applied with
+        a single create, one write per distinct set of values and a single unlink.
+        Onchanges keep using `_apply_or_cleanup_free_services_from_support`, which
+        works on the virtual records of the form.
+        """
+        paid_lines = self.filtered(lambda l: not l.display_type and not l.is_free_line)
+        if not paid_lines:
+            return
+        SaleOrderLine = self.env['sale.order.line'].with_context(no_free_goods=True)
+
+        to_create = []
+        to_write = defaultdict(list)
+        to_unlink = SaleOrderLine
+        resequence = {}
+        for order, lines in paid_lines.grouped('order_id').items():
+            free_by_paid = {}
+            for l in order.order_line:
+                if l.is_free_line and l.support_bonus_of_id:
+                    free_by_paid.setdefault(l.support_bonus_of_id.id, l)
+
+            free_qtys = self.env['vendor.support']._get_free_quantities(
+                [line._get_free_qty_request(line.support_id) for line in lines]
+            )
+            slots = []
+            removed = SaleOrderLine
+            for line, free_qty in zip(lines, free_qtys):
+                free_line = free_by_paid.get(line.id)
+                if free_qty <= 0:
+                    removed |= free_line or SaleOrderLine
+                    continue
+
+                free_product = getattr(line.support_id, 'free_product_id', None) or line.product_id
+                values = line._prepare_free_line_vals(free_product, free_qty)
+                if free_line:
+                    update_vals = line._get_free_line_update_vals(free_line, values)
+                    if update_vals:
+                        to_write[tuple(sorted(update_vals.items()))].append(free_line.id)
+                    slots.append((line, free_line))
+                else:
+                    slots.append((line, ('new', len(to_create))))
+                    to_create.append(values)
+
+            to_unlink |= removed
+            for target, sequence in order._plan_free_line_sequences(slots, removed).items():
+                if isinstance(target, tuple):
+                    to_create[target[1]]['sequence'] = sequence
+                else:
+                    resequence[target.id] = sequence
+
+        if to_unlink:
+            to_unlink.unlink()
+        SaleOrderLine._write_sequences(resequence)
+        for frozen_vals, line_ids in to_write.items():
+            SaleOrderLine.browse(line_ids).write(dict(frozen_vals))
+        if to_create:
+            SaleOrderLine.create(to_create)
+
+    @api.model
+    def _write_sequences(self, sequences):
+        """Apply a {line id: sequence} mapping with a single UPDATE.
+
+        Behaves like `write` for the rest of the ORM: access rights are checked, the
+        write date and user are set and the fields depending on the sequence are
+        marked for recomputation.
+        """
+        if not sequences:
+            return
+        lines = self.browse(list(sequences))
+        lines.check_access('write')
+        self.flush_model(['sequence'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE sale_order_line AS l
+               SET sequence = v.sequence,
+                   write_date = NOW() AT TIME ZONE 'UTC', write_uid = %s
+              FROM unnest(%s::int[], %s::int[]) AS v(id, sequence)
+             WHERE l.id = v.id
+            """,
+            self.env.uid, list(sequences), list(sequences.values()),
+        ))
+        lines.invalidate_recordset(['sequence', 'write_date', 'write_uid'])
+        lines.modified(['sequence'])
+
+    def _get_free_line_update_vals(self, free_line, values):
+        """Values to write on an existing free line so it matches `values` (sequence excluded)."""
+        update_vals = {}
+        if free_line.product_id.id != values['product_id']:
+            update_vals['product_id'] = values['product_id']
+            update_vals['product_uom'] = values['product_uom']
+            update_vals['name'] = values['name']
+
+        # qty change
+        if float(free_line.product_uom_qty) != float(values['product_uom_qty']):
+            update_vals['product_uom_qty'] = values['product_uom_qty']
+
+        # always enforce free price/discount
+        if update_vals or free_line.price_unit or free_line.discount:
+            update_vals['price_unit'] = 0.0
+            update_vals['discount'] = 0.0
+        return update_vals
 
     def _apply_or_cleanup_free_services_from_support(self):
         """Create/update/remove the paired free service line for this paid line based on support tiers."""
@@ -443,37 +856,20 @@ class SaleOrderLine(models.Model):
         free_line = self._get_existing_free_line()
         values = self._prepare_free_line_vals(free_product, free_qty)
 
-        if free_line:
-            update_vals = {}
-
-            if free_line.product_id.id != values['product_id']:
-                update_vals['product_id'] = values['product_id']
-                update_vals['product_uom'] = values['product_uom']
-                update_vals['name'] = values['name']
-
-            # qty change
-            if float(free_line.product_uom_qty) != float(values['product_uom_qty']):
-                update_vals['product_uom_qty'] = values['product_uom_qty']
-            
-            desired_seq = int(self.sequence or 0) + 1
-            if int(free_line.sequence or 0) != desired_seq:
-                # if another line already occupies desired_seq, bump a slot
-                conflict = self.order_id.order_line.filtered(
-                    lambda l: l.id != free_line.id and not l.display_type and int(l.sequence or 0) == desired_seq
-                )
-                if conflict:
-                    self._ensure_slot_after_line()
-                update_vals['sequence'] = desired_seq
-
-            # always enforce free price/discount
-            update_vals['price_unit'] = 0.0
-            update_vals['discount'] = 0.0
+        slot = free_line or ('new', 0)
+        update_vals = self._get_free_line_update_vals(free_line, values) if free_line else {}
+        for target, sequence in self.order_id._plan_free_line_sequences([(self, slot)]).items():
+            if isinstance(target, tuple):
+                values['sequence'] = sequence
+            elif free_line and target == free_line:
+                update_vals['sequence'] = sequence
+            else:
+                target.sequence = sequence
 
+        if free_line:
             if update_vals:
                 free_line.with_context(no_free_goods=True).write(update_vals)
         else:
-            self._ensure_slot_after_line()
-            values['sequence'] = int(self.sequence or 0) + 1
             self.with_context(no_free_goods=True).order_id.write({'order_line': [(0, 0, values)]})
 
     def _remove_existing_free_line(self):
@@ -520,35 +916,24 @@ class SaleOrderLine(models.Model):
 
     def _compute_free_qty_from_tiers(self, support):
         self.ensure_one()
-
-        tier_lines = getattr(support, 'free_tier_ids', [])
         free_product = getattr(support, 'free_product_id', None) or self.product_id
+        free_qty = self.env['vendor.support']._get_free_quantities([self._get_free_qty_request(support)])[0]
+        return free_qty, free_product
 
-        ordered = self.product_uom_qty or 0.0
-        if not tier_lines or ordered <= 0:
-            return 0.0, free_product
-
-        best_min, best_percent = -1.0, 0.0
-        for t in tier_lines:
-            min_qty = getattr(t, 'min_qty', 0.0) or 0.0
-            percent = getattr(t, 'free_percent', 0.0) or 0.0
-            if min_qty <= ordered and min_qty >= best_min and percent > 0.0:
-                best_min, best_percent = float(min_qty), float(percent)
-
-        if best_percent <= 0.0:
-            return 0.0, free_product
-
-        # Free qty rounded with UoM precision
-        uom = self.product_uom or self.product_id.uom_id
-        rounding = uom.rounding or 0.01
-        free_qty = float_round(ordered * (best_percent / 100.0),
-                               precision_rounding=rounding)
-        return (free_qty if free_qty > 0 else 0.0), free_product
+    def _get_free_qty_request(self, support):
+        """(support, ordered qty, uom) triple resolved by `vendor.support._get_free_quantities`."""
+        self.ensure_one()
+        return support, self.product_uom_qty or 0.0, self.product_uom or self.product_id.uom_id
 
-    @api.depends('price_unit','purchase_price','support_id.commission_pct')
+    # The support commission is deliberately not a dependency: when it changes, only the
+    # lines of open quotes are recomputed (see vendor.support._recompute_open_line_commissions).
+    # Confirmed lines are frozen: whatever triggers their recompute, they keep their value.
+    @api.depends('price_unit','purchase_price','support_id')
     def _compute_commission_pct(self):
 
         for line in self:
+            if line.state == 'sale' and line._origin.commission_pct:
+                continue
             fallback = float(line.support_id.commission_pct or 0.0)
 
             price = float(line.price_unit or 0.0)
@@ -562,6 +947,15 @@ class SaleOrderLine(models.Model):
             line.commission_pct = round(pct, 2) if (cost_company > 0.0) else fallback
 
 
+    def _recompute_commission_pct(self):
+        """Recompute and store the commission of `self`, cascading to the orders' approval level."""
+        self.env.add_to_compute(self._fields['commission_pct'], self)
+        # add_to_compute does not mark the dependent fields (min_paid_commission_pct, then
+        # approval_required_level on the orders): do it explicitly before flushing
+        self.modified(['commission_pct'])
+        self.flush_recordset(['commission_pct'])
+        self.order_id.flush_recordset(['min_paid_commission_pct', 'approval_required_level'])
+
     @api.depends('product_template_id', 'company_id', 'currency_id', 'product_uom')
     def _compute_purchase_price(self):
         for line in self:
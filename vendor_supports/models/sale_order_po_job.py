@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+PO_JOB_MAX_ATTEMPTS = 3
+PO_JOB_BATCH_SIZE = 20
+
+
+class SaleOrderPoJob(models.Model):
+    _name = 'sale.order.po.job'
+    _description = 'Sale Order - Deferred Purchase Order Generation'
+    _order = 'id desc'
+
+    sale_id = fields.Many2one('sale.order', string='Commande', required=True, ondelete='cascade', index=True)
+    company_id = fields.Many2one(related='sale_id.company_id', store=True)
+    state = fields.Selection([
+        ('pending', 'En attente'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ], string='État', default='pending', required=True, index=True)
+    attempts = fields.Integer('Tentatives', default=0)
+    error = fields.Text('Erreur', readonly=True)
+    date_done = fields.Datetime('Traité le', readonly=True)
+
+    @api.model
+    def _enqueue(self, orders):
+        """Queue the purchase order generation of `orders`, once per order."""
+        pending = self.search([('sale_id', 'in', orders.ids), ('state', '=', 'pending')]).sale_id
+        jobs = self.create([{'sale_id': order.id} for order in orders - pending])
+        if jobs:
+            self.env.ref('vendor_supports.ir_cron_sale_order_po_jobs')._trigger()
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=PO_JOB_BATCH_SIZE):
+        """Process the pending jobs by batches, committing after each batch.
+
+        Jobs are locked with SKIP LOCKED so that concurrent workers never process the
+        same job, and each job is tried at most once per run.
+        """
+        last_id = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM sale_order_po_job
+                 WHERE state = 'pending' AND id > %s
+              ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [last_id, batch_size])
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            if not ids:
+                break
+            last_id = ids[-1]
+            self.browse(ids)._process()
+            remaining = self.search_count([('state', '=', 'pending'), ('id', '>', last_id)])
+            self.env['ir.cron']._notify_progress(done=len(ids), remaining=remaining)
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    def _process(self):
+        """Generate the purchase orders of the jobs' orders, the whole batch at once when possible."""
+        # Idempotency: orders already having their purchase orders are not processed again
+        generated = self.env['purchase.order'].sudo().search([('sale_id', 'in', self.sale_id.ids)]).sale_id
+        to_generate = self.filtered(lambda j: j.sale_id.state == 'sale' and j.sale_id not in generated)
+        (self - to_generate)._mark_done()
+        if not to_generate:
+            return
+
+        try:
+            with self.env.cr.savepoint():
+                to_generate.sale_id._create_purchase_orders_from_so()
+            to_generate._mark_done()
+            return
+        except Exception:
+            _logger.warning("Batch purchase order generation failed for jobs %s, retrying job by job",
+                            to_generate.ids, exc_info=True)
+
+        for job in to_generate:
+            try:
+                with self.env.cr.savepoint():
+                    job.sale_id._create_purchase_orders_from_so()
+                job._mark_done()
+            except Exception as e:
+                attempts = job.attempts + 1
+                _logger.warning("Purchase order generation failed for job %s (%s, attempt %s)",
+                                job.id, job.sale_id.name, attempts, exc_info=True)
+                job.write({
+                    'attempts': attempts,
+                    'error': str(e),
+                    'state': 'failed' if attempts >= PO_JOB_MAX_ATTEMPTS else 'pending',
+                })
+
+    def _mark_done(self):
+        # One write per distinct number of attempts rather than one per job
+        now = fields.Datetime.now()
+        for attempts, jobs in self.grouped('attempts').items():
+            jobs.write({
+                'state': 'done',
+                'attempts': attempts + 1,
+                'error': False,
+                'date_done': now,
+            })
+
+    def action_retry(self):
+        self.write({'state': 'pending', 'attempts': 0, 'error': False})
+        self.env.ref('vendor_supports.ir_cron_sale_order_po_jobs')._trigger()
+        return True
@@ -1,13 +1,33 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+import base64
+import logging
+from bisect import bisect_right
+from urllib.parse import quote
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, float_round
+from odoo.tools.sql import escape_psql, index_exists
+
+from .sale_order import OPEN_QUOTE_STATES
+from .vendor_support_perf import instrument
+
+_logger = logging.getLogger(__name__)
+
+# Above this number of open lines, a commission change is propagated by the cron: saving
+# a support only recomputes a handful of quotes within the user's transaction
+COMMISSION_SYNC_LINE_LIMIT = 200
+COMMISSION_BATCH_SIZE = 1000
+REPRICING_CHUNK_SIZE = 1000
+# Trigram index on the partner names, which the base module only indexes as btree
+PARTNER_NAME_TRGM_INDEX = "res_partner_name_vendor_support_trgm_idx"
 
 class VendorSupportCategory(models.Model):
     _name = 'vendor.support.category'
     _description = 'Vendor Support Category'
     _order = 'name'
 
-    name = fields.Char(required=True)
+    name = fields.Char(required=True, index='trigram')
     description = fields.Text()
 
 
@@ -18,18 +38,29 @@ class VendorSupport(models.Model):
     _check_company_auto = True
     _inherit = ['mail.thread']
 
-    name = fields.Char('Nom', required=True)
-    partner_id = fields.Many2one('res.partner', string='Fournisseur', required=True, domain=[('supplier_rank', '>', 0)])
+    name = fields.Char('Nom', required=True, index='trigram')
+    partner_id = fields.Many2one('res.partner', string='Fournisseur', required=True, domain=[('supplier_rank', '>', 0)], index=True)
     company_id = fields.Many2one('res.company', string='Société', default=lambda self: self.env.company, index=True)
     currency_id = fields.Many2one('res.currency', string='Devise', default=lambda self: self.env.company.currency_id.id)
-    category_id = fields.Many2one('vendor.support.category', string='Catégorie')
+    category_id = fields.Many2one('vendor.support.category', string='Catégorie', index=True)
+    search_text = fields.Char(
+        'Recherche', compute='_compute_search_text', search='_search_search_text',
+        help="Technical field of the search box: name, URL, vendor or category.")
     description = fields.Text('Description')
-    url = fields.Char('URL')
+    url = fields.Char('URL', index='trigram')
     version_ar = fields.Boolean('AR')
     version_fr = fields.Boolean('FR')
     version_en = fields.Boolean('EN')
-    media_kit = fields.Binary('Kit Média.')
+    media_kit = fields.Binary('Kit Média.', compute='_compute_media_kit', inverse='_inverse_media_kit')
     media_kit_filename = fields.Char('')
+    media_kit_ids = fields.One2many('vendor.support.media.kit', 'support_id', string='Versions du kit média')
+    current_media_kit_id = fields.Many2one(
+        'vendor.support.media.kit', string='Kit média actuel',
+        compute='_compute_current_media_kit_id', store=True)
+    media_kit_cleared = fields.Boolean(
+        'Kit média retiré', copy=False,
+        help="The media kit was removed from the form: no current kit until a new file is uploaded. "
+             "Previous versions are kept.")
     visitors_unique = fields.Integer('Visiteurs uniques')
     sessions_per_month = fields.Integer('Sessions/mois')
     pageviews_per_month = fields.Integer('Pages vues/mois')
@@ -41,11 +72,15 @@ class VendorSupport(models.Model):
     social_linkedin = fields.Char('LinkedIn')
     seg_mobile_pct = fields.Float('Mobile')
     seg_desktop_pct = fields.Float('Desktop')
+    metric_ids = fields.One2many('vendor.support.metric', 'support_id', string='Historique d\'audience')
+    metrics_month = fields.Date('Mois des dernières mesures', readonly=True)
+    visitors_avg_3m = fields.Integer('Visiteurs (moy. 3 mois)', readonly=True)
+    visitors_growth_pct = fields.Float('Croissance visiteurs (%)', readonly=True)
     csp = fields.Selection([('A','A'), ('A+','A+'), ('B','B'), ('B+','B+')], string='CSP')
     commission_pct = fields.Float('Commission')
     campaign_commitment = fields.Selection([('none','None'), ('low','Low'), ('medium','Medium'), ('high','High')], string='Engagement sur les campagnes')
     delivery_issues = fields.Char('Problèmes de livraison')
-    blacklisted = fields.Boolean('Blacklisté')
+    blacklisted = fields.Boolean('Blacklisté', index=True)
     free_tier_ids = fields.One2many('vendor.support.free.tier', 'support_id', string='Gratuités')
     minimum_buy_amount = fields.Monetary('Minimum Buy', currency_field='currency_id')
     contact_ids = fields.Many2many('res.partner', 'vendor_support_contact_rel', 'support_id', 'partner_id', string='Related Contacts')
@@ -56,6 +91,14 @@ class VendorSupport(models.Model):
         store=True
     )
     product_template_ids = fields.One2many('product.template','support_id')
+    price_log_ids = fields.One2many('vendor.support.price.log', 'support_id', string='Historique des prix')
+    commission_recompute_pending = fields.Boolean(
+        'Recalcul des commissions en attente', readonly=True, copy=False,
+        help="The new commission is being applied to the open quotes by a scheduled action.")
+    auto_reprice = fields.Boolean(
+        'Mettre à jour les prix automatiquement', default=True,
+        help="Reprice the products of the support as soon as its commission changes. "
+             "Otherwise, use the price preview to review and apply the new prices.")
 
     _sql_constraints = [
         ('seg_pct_valid', 'CHECK(seg_mobile_pct >= 0 AND seg_desktop_pct >= 0 AND seg_mobile_pct <= 100 AND seg_desktop_pct <= 100)', 'Segmentation percentages must be between 0 and 100.'),
@@ -74,6 +117,327 @@ class VendorSupport(models.Model):
         for rec in self:
             rec.product_count = counts.get(rec.id, 0)
 
+    def init(self):
+        super().init()
+        if self.env.registry.has_trigram and not index_exists(self.env.cr, PARTNER_NAME_TRGM_INDEX):
+            self.env.cr.execute(SQL(
+                "CREATE INDEX %s ON res_partner USING gin (name gin_trgm_ops)",
+                SQL.identifier(PARTNER_NAME_TRGM_INDEX),
+            ))
+
+    @api.model
+    def _match_text(self, name, allowed=None, limit=None):
+        """Return the ids of the supports whose name, URL, vendor or category contains `name`,
+        best matches first.
+
+        Each column is looked up on its own, through its own pg_trgm index, and the matches are
+        merged afterwards: a single OR over the joined tables could not use any of them.
+        Vendor and category matches rank below direct matches on the support itself.
+        Like the ORM, `%`, `_` and `\\` in `name` are matched literally.
+        """
+        pattern = f'%{escape_psql(name)}%'
+        self.env.cr.execute(SQL(
+            """
+            WITH matches AS (
+                SELECT id, similarity(name, %(name)s) AS score
+                  FROM vendor_support
+                 WHERE name ILIKE %(pattern)s
+             UNION ALL
+                SELECT id, similarity(url, %(name)s)
+                  FROM vendor_support
+                 WHERE url ILIKE %(pattern)s
+             UNION ALL
+                SELECT s.id, 0.8 * similarity(p.name, %(name)s)
+                  FROM res_partner p
+                  JOIN vendor_support s ON s.partner_id = p.id
+                 WHERE p.name ILIKE %(pattern)s
+             UNION ALL
+                SELECT s.id, 0.6 * similarity(c.name, %(name)s)
+                  FROM vendor_support_category c
+                  JOIN vendor_support s ON s.category_id = c.id
+                 WHERE c.name ILIKE %(pattern)s
+            )
+            SELECT s.id
+              FROM matches m
+              JOIN vendor_support s ON s.id = m.id
+             WHERE %(allowed)s
+          GROUP BY s.id, s.name
+          ORDER BY MAX(m.score) DESC, s.name, s.id
+             %(limit)s
+            """,
+            name=name, pattern=pattern,
+            allowed=SQL('s.id IN %s', allowed.subselect()) if allowed is not None else SQL('TRUE'),
+            limit=SQL('LIMIT %s', limit) if limit else SQL(),
+        ))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        """Search supports by name, URL, vendor and category, best matches first.
+
+        Blacklisted supports are left out. Without pg_trgm the default search is used.
+        """
+        if not name or operator != 'ilike' or not self.env.registry.has_trigram:
+            return super().name_search(name, domain, operator, limit)
+        allowed = self._search(list(domain or []) + [('blacklisted', '=', False)])
+        supports = self.browse(self._match_text(name, allowed, limit))
+        return [(support.id, support.display_name) for support in supports.sudo()]
+
+    def _compute_search_text(self):
+        self.search_text = False
+
+    def _search_search_text(self, operator, value):
+        if operator != 'ilike' or not value or not self.env.registry.has_trigram:
+            return ['|', '|', '|', ('name', operator, value), ('url', operator, value),
+                    ('partner_id', operator, value), ('category_id', operator, value)]
+        return [('id', 'in', self._match_text(value))]
+
+    @api.depends('media_kit_ids.version', 'media_kit_cleared')
+    def _compute_current_media_kit_id(self):
+        for rec in self:
+            rec.current_media_kit_id = not rec.media_kit_cleared and rec.media_kit_ids.sorted('version')[-1:]
+
+    @api.depends('current_media_kit_id')
+    def _compute_media_kit(self):
+        # Only evaluated when the field is actually read: listing or reading supports
+        # does not load any media kit.
+        for rec in self:
+            rec.media_kit = rec.current_media_kit_id.datas
+
+    def _inverse_media_kit(self):
+        """Uploading a media kit adds a version; uploading the same file again is a no-op.
+        Clearing it leaves the support without a current kit but keeps every version."""
+        MediaKit = self.env['vendor.support.media.kit']
+        for rec in self:
+            if not rec.media_kit:
+                rec.media_kit_cleared = True
+                continue
+            checksum = self.env['ir.attachment']._compute_checksum(base64.b64decode(rec.media_kit))
+            if checksum == rec.current_media_kit_id.checksum:
+                continue
+            rec.media_kit_cleared = False
+            MediaKit.create({
+                'support_id': rec.id,
+                'version': max(rec.media_kit_ids.mapped('version'), default=0) + 1,
+                'datas': rec.media_kit,
+                'filename': rec.media_kit_filename,
+            })
+
+    def _apply_metrics(self):
+        """Fill the audience fields from the monthly metrics history.
+
+        The current fields take the most recent month, alongside the trailing 3-month
+        visitors average and the month-over-month visitors growth used for ranking.
+        """
+        summary = self.env['vendor.support.metric']._get_summary(self.ids)
+        for rec in self:
+            data = summary.get(rec.id)
+            if not data:
+                continue
+            vals = {fname: value for fname, value in data['latest'].items() if value is not None}
+            vals.update({
+                'metrics_month': data['month'],
+                'visitors_avg_3m': round(data['avg_3m']['visitors_unique']),
+                'visitors_growth_pct': data['growth_pct'],
+            })
+            rec.write(vals)
+
+    @api.model
+    @tools.ormcache('support_id')
+    def _get_free_tier_table(self, support_id):
+        """Compiled free tiers of a support: ascending minimum quantities and their free %.
+
+        Only tiers granting something are kept and, for equal minimums, the last one wins,
+        so the applicable tier is found with a single bisection. Cached per registry and
+        cleared whenever a free tier changes.
+        """
+        tiers = self.env['vendor.support.free.tier'].sudo().search_read(
+            [('support_id', '=', support_id), ('free_percent', '>', 0.0)],
+            ['min_qty', 'free_percent'], order='min_qty, id',
+        )
+        table = {}
+        for tier in tiers:
+            table[tier['min_qty'] or 0.0] = tier['free_percent']
+        return tuple(table), tuple(table.values())
+
+    @api.model
+    @instrument()
+    def _get_free_quantities(self, requests):
+        """Resolve the free quantities of many (support, ordered qty, uom) triples in one call.
+
+        Returns the free quantities in the order of `requests`, rounded with the UoM precision.
+        """
+        free_qtys = []
+        for support, ordered, uom in requests:
+            free_qty = 0.0
+            if support._origin and (ordered or 0.0) > 0:
+                min_qtys, percents = self._get_free_tier_table(support._origin.id)
+                index = bisect_right(min_qtys, ordered)
+                if index:
+                    rounding = uom.rounding or 0.01
+                    free_qty = float_round(ordered * (percents[index - 1] / 100.0), precision_rounding=rounding)
+            free_qtys.append(max(free_qty, 0.0))
+        return free_qtys
+
+    @api.model
+    @tools.ormcache('support_id')
+    def _get_allowed_template_ids(self, support_id):
+        """Ids of the product templates sold through a support, i.e. having it on a vendor pricelist.
+
+        Computed once per support and shared by all order lines; cleared whenever a
+        `product.supplierinfo` carrying a support changes or one of its products is
+        (un)archived.
+        """
+        templates = self.env['product.template'].sudo().search([('seller_ids.support_id', '=', support_id)])
+        return frozenset(templates.ids)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'commission_pct' in vals:
+            self.filtered('auto_reprice')._reprice_products()
+            self._recompute_open_line_commissions()
+        if 'minimum_buy_amount' in vals:
+            self._get_open_quotes()._recompute_support_totals()
+        return res
+
+    def _get_repricing_diff(self):
+        """Products of the supports whose cost or sale price no longer match the commission.
+
+        Computed in one query: cost = public price less the support commission, sale
+        price = public price. Both sides are compared at the Product Price precision, the
+        one the ORM stores them with, so products already up to date are left alone.
+        Returns one dict per product with the old and new cost, price and margin.
+        """
+        self.env['product.template'].flush_model(['public_price', 'support_id', 'standard_price', 'list_price'])
+        self.flush_recordset(['commission_pct'])
+        digits = self.env['decimal.precision'].precision_get('Product Price')
+        self.env.cr.execute(SQL(
+            """
+            SELECT id, support_id, name, old_cost, new_cost, old_price, new_price
+              FROM (
+                    SELECT pt.id, pt.support_id, COALESCE(pt.name->>%(lang)s, pt.name->>'en_US') AS name,
+                           COALESCE(pt.standard_price, 0) AS old_cost,
+                           ROUND(GREATEST(COALESCE(pt.public_price, 0)
+                                 * (1 - COALESCE(vs.commission_pct, 0) / 100.0), 0)::numeric, %(digits)s) AS new_cost,
+                           COALESCE(pt.list_price, 0) AS old_price,
+                           ROUND(COALESCE(pt.public_price, 0)::numeric, %(digits)s) AS new_price
+                      FROM product_template pt
+                      JOIN vendor_support vs ON vs.id = pt.support_id
+                     WHERE pt.support_id = ANY(%(support_ids)s)
+                   ) AS prices
+             WHERE ROUND(old_cost::numeric, %(digits)s) != new_cost
+                OR ROUND(old_price::numeric, %(digits)s) != new_price
+          ORDER BY id
+            """,
+            digits=digits, support_ids=self.ids, lang=self.env.lang or 'en_US',
+        ))
+
+        def margin(price, cost):
+            return (price - cost) / price * 100.0 if price else 0.0
+
+        diff = []
+        for tmpl_id, support_id, name, old_cost, new_cost, old_price, new_price in self.env.cr.fetchall():
+            old_cost, new_cost, old_price, new_price = map(float, (old_cost, new_cost, old_price, new_price))
+            diff.append({
+                'product_tmpl_id': tmpl_id,
+                'support_id': support_id,
+                'name': name,
+                'old_cost': old_cost,
+                'new_cost': new_cost,
+                'old_price': old_price,
+                'new_price': new_price,
+                'old_margin': margin(old_price, old_cost),
+                'new_margin': margin(new_price, new_cost),
+            })
+        return diff
+
+    @instrument()
+    def _reprice_products(self, dry_run=False, chunk_size=REPRICING_CHUNK_SIZE):
+        """Reprice all products of the supports as a set operation.
+
+        With `dry_run`, only return the diff (see `_get_repricing_diff`). Otherwise apply it
+        with one UPDATE per chunk, keep the ORM cache consistent and log every change.
+        """
+        diff = self._get_repricing_diff()
+        if dry_run or not diff:
+            return diff
+
+        Template = self.env['product.template']
+        for start in range(0, len(diff), chunk_size):
+            chunk = diff[start:start + chunk_size]
+            self.env.cr.execute(SQL(
+                """
+                UPDATE product_template pt
+                   SET standard_price = v.cost, list_price = v.price,
+                       write_date = NOW() AT TIME ZONE 'UTC', write_uid = %s
+                  FROM unnest(%s::int[], %s::numeric[], %s::numeric[]) AS v(id, cost, price)
+                 WHERE pt.id = v.id
+                """,
+                self.env.uid,
+                [row['product_tmpl_id'] for row in chunk],
+                [row['new_cost'] for row in chunk],
+                [row['new_price'] for row in chunk],
+            ))
+
+        templates = Template.browse([row['product_tmpl_id'] for row in diff])
+        templates.invalidate_recordset(['standard_price', 'list_price', 'write_date', 'write_uid'])
+        templates.modified(['standard_price', 'list_price'])
+
+        self.env['vendor.support.price.log'].sudo().create([{
+            'support_id': row['support_id'],
+            'product_tmpl_id': row['product_tmpl_id'],
+            'old_cost': row['old_cost'],
+            'new_cost': row['new_cost'],
+            'old_price': row['old_price'],
+            'new_price': row['new_price'],
+        } for row in diff])
+        return diff
+
+    def action_preview_repricing(self):
+        action = self.env['ir.actions.actions']._for_xml_id('vendor_supports.action_support_reprice')
+        action['context'] = {'active_model': self._name, 'active_ids': self.ids}
+        return action
+
+    def _get_open_quotes(self):
+        return self.env['sale.order'].sudo().search([
+            ('order_line.support_id', 'in', self.ids),
+            ('state', 'in', OPEN_QUOTE_STATES),
+        ])
+
+    def _get_open_commission_lines(self):
+        return self.env['sale.order.line'].sudo().search([
+            ('support_id', 'in', self.ids),
+            ('state', 'in', OPEN_QUOTE_STATES),
+        ], order='id')
+
+    def _recompute_open_line_commissions(self):
+        """Apply the supports' commission to the lines of open quotes only.
+
+        Small recomputes run right away; larger ones are handed over to a cron that
+        processes them by batches, so that saving a support does not lock order lines.
+        """
+        lines = self._get_open_commission_lines()
+        if len(lines) <= COMMISSION_SYNC_LINE_LIMIT:
+            lines._recompute_commission_pct()
+            return
+        self.commission_recompute_pending = True
+        self.env.ref('vendor_supports.ir_cron_recompute_support_commissions')._trigger()
+
+    @api.model
+    def _cron_recompute_line_commissions(self, batch_size=COMMISSION_BATCH_SIZE):
+        supports = self.search([('commission_recompute_pending', '=', True)])
+        if not supports:
+            return
+        line_ids = supports._get_open_commission_lines().ids
+        for start in range(0, len(line_ids), batch_size):
+            batch = self.env['sale.order.line'].sudo().browse(line_ids[start:start + batch_size])
+            batch._recompute_commission_pct()
+            done = start + len(batch)
+            _logger.info("Support commissions: %s/%s open order lines recomputed", done, len(line_ids))
+            self.env['ir.cron']._notify_progress(done=len(batch), remaining=len(line_ids) - done)
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+        supports.commission_recompute_pending = False
+
     @api.constrains('seg_mobile_pct', 'seg_desktop_pct')
     def _check_segmentation_sum(self):
         for rec in self:
@@ -106,6 +470,60 @@ class VendorSupport(models.Model):
         }
 
 
+class VendorSupportMediaKit(models.Model):
+    _name = 'vendor.support.media.kit'
+    _description = 'Vendor Support Media Kit Version'
+    _order = 'version desc'
+
+    support_id = fields.Many2one('vendor.support', string='Support', required=True, ondelete='cascade', index=True)
+    version = fields.Integer('Version', required=True, default=1)
+    datas = fields.Binary('Fichier', attachment=True, required=True)
+    filename = fields.Char('Nom du fichier')
+    checksum = fields.Char('Checksum', compute='_compute_file_info', store=True, index=True)
+    file_size = fields.Integer('Taille', compute='_compute_file_info', store=True)
+
+    _sql_constraints = [
+        ('support_version_uniq', 'UNIQUE(support_id, version)', 'A media kit version must be unique per support.'),
+    ]
+
+    @api.depends('datas')
+    def _compute_file_info(self):
+        # Read from the filestore attachments, without loading the files
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'datas'),
+            ('res_id', 'in', self._origin.ids),
+        ])
+        by_res_id = {att.res_id: att for att in attachments}
+        for kit in self:
+            att = by_res_id.get(kit._origin.id)
+            kit.checksum = att.checksum if att else False
+            kit.file_size = att.file_size if att else 0
+
+    def action_download(self):
+        """Stream the file through /web/content, which serves it from the filestore with range support."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self._name}/{self.id}/datas/{quote(self.filename or "media_kit", safe="")}?download=true',
+            'target': 'self',
+        }
+
+
+class VendorSupportPriceLog(models.Model):
+    _name = 'vendor.support.price.log'
+    _description = 'Vendor Support Price Change Log'
+    _order = 'id desc'
+
+    support_id = fields.Many2one('vendor.support', string='Support', required=True, ondelete='cascade', index=True)
+    product_tmpl_id = fields.Many2one('product.template', string='Produit', required=True, ondelete='cascade')
+    user_id = fields.Many2one('res.users', string='Utilisateur', default=lambda self: self.env.user)
+    old_cost = fields.Float("Ancien prix d'achat", digits='Product Price')
+    new_cost = fields.Float("Nouveau prix d'achat", digits='Product Price')
+    old_price = fields.Float('Ancien prix de vente', digits='Product Price')
+    new_price = fields.Float('Nouveau prix de vente', digits='Product Price')
+
+
 class VendorSupportFreeTier(models.Model):
     _name = 'vendor.support.free.tier'
     _description = 'Vendor Support Free Tier'
@@ -119,3 +537,19 @@ class VendorSupportFreeTier(models.Model):
         ('free_percent_valid', 'CHECK(free_percent >= 0 AND free_percent <= 100)', 'Free % must be between 0 and 100.'),
         ('min_qty_positive', 'CHECK(min_qty >= 0)', 'Minimum quantity must be positive.'),
     ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tiers = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return tiers
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+# Metric columns, in the order used by the bulk upsert
+METRIC_FIELDS = (
+    'visitors_unique',
+    'sessions_per_month',
+    'pageviews_per_month',
+    'avg_visit_duration',
+    'bounce_rate',
+    'seg_mobile_pct',
+    'seg_desktop_pct',
+)
+METRIC_INTEGER_FIELDS = ('visitors_unique', 'sessions_per_month', 'pageviews_per_month', 'avg_visit_duration')
+METRIC_PERCENT_FIELDS = ('bounce_rate', 'seg_mobile_pct', 'seg_desktop_pct')
+# Same tolerance as vendor.support._check_segmentation_sum
+SEGMENTATION_SUM_TOLERANCE = 0.5
+
+
+class VendorSupportMetric(models.Model):
+    _name = 'vendor.support.metric'
+    _description = 'Vendor Support Monthly Audience Metrics'
+    _order = 'support_id, month desc'
+    _rec_name = 'month'
+
+    support_id = fields.Many2one('vendor.support', string='Support', required=True, ondelete='cascade')
+    month = fields.Date('Mois', required=True, help="First day of the month the figures relate to.")
+    visitors_unique = fields.Integer('Visiteurs uniques', aggregator='sum')
+    sessions_per_month = fields.Integer('Sessions', aggregator='sum')
+    pageviews_per_month = fields.Integer('Pages vues', aggregator='sum')
+    avg_visit_duration = fields.Integer('Durée de visite', aggregator='avg')
+    bounce_rate = fields.Float('Taux de rebond', aggregator='avg')
+    seg_mobile_pct = fields.Float('Mobile', aggregator='avg')
+    seg_desktop_pct = fields.Float('Desktop', aggregator='avg')
+
+    _sql_constraints = [
+        ('support_month_uniq', 'UNIQUE(support_id, month)', 'Only one set of metrics per support and month.'),
+        ('counts_positive', 'CHECK(visitors_unique >= 0 AND sessions_per_month >= 0 AND pageviews_per_month >= 0 '
+                            'AND avg_visit_duration >= 0)', 'Audience counts cannot be negative.'),
+        ('pct_valid', 'CHECK(bounce_rate >= 0 AND bounce_rate <= 100 AND seg_mobile_pct >= 0 AND seg_mobile_pct <= 100 '
+                      'AND seg_desktop_pct >= 0 AND seg_desktop_pct <= 100)', 'Percentages must be between 0 and 100.'),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('month'):
+                vals['month'] = fields.Date.to_date(vals['month']).replace(day=1)
+        records = super().create(vals_list)
+        records.support_id._apply_metrics()
+        return records
+
+    def write(self, vals):
+        if vals.get('month'):
+            vals['month'] = fields.Date.to_date(vals['month']).replace(day=1)
+        supports = self.support_id
+        res = super().write(vals)
+        (supports | self.support_id)._apply_metrics()
+        return res
+
+    def unlink(self):
+        supports = self.support_id
+        res = super().unlink()
+        supports.exists()._apply_metrics()
+        return res
+
+    @api.model
+    def _upsert(self, rows, chunk_size=1000):
+        """Insert or update metrics from (support_id, month, {field: value}) tuples.
+
+        Rows are written by multi-row INSERT ... ON CONFLICT (support_id, month) statements
+        of `chunk_size` rows: importing an export twice updates the months in place, and
+        columns missing from a row keep their current value.
+        Returns the ids of the supports touched.
+        """
+        self.flush_model()
+        columns = SQL(', ').join(SQL.identifier(fname) for fname in METRIC_FIELDS)
+        updates = SQL(', ').join(
+            SQL('%s = COALESCE(EXCLUDED.%s, vendor_support_metric.%s)',
+                SQL.identifier(fname), SQL.identifier(fname), SQL.identifier(fname))
+            for fname in METRIC_FIELDS
+        )
+        # a statement cannot upsert the same key twice: merge repeated months, last row wins
+        merged = {}
+        for support_id, month, metrics in rows:
+            key = (support_id, fields.Date.to_date(month).replace(day=1))
+            merged.setdefault(key, {}).update(metrics)
+        rows = list(merged.items())
+
+        uid = self.env.uid
+        for start in range(0, len(rows), chunk_size):
+            values = []
+            for (support_id, month), metrics in rows[start:start + chunk_size]:
+                values.append(SQL(
+                    "(%s, %s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')",
+                    support_id, month,
+                    SQL(', ').join(SQL('%s', metrics.get(fname)) for fname in METRIC_FIELDS),
+                    uid, uid,
+                ))
+            self.env.cr.execute(SQL(
+                """
+                INSERT INTO vendor_support_metric
+                       (support_id, month, %(columns)s, create_uid, write_uid, create_date, write_date)
+                VALUES %(values)s
+                ON CONFLICT (support_id, month) DO UPDATE
+                   SET %(updates)s, write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+                """,
+                columns=columns, values=SQL(', ').join(values), updates=updates,
+            ))
+        self.invalidate_model()
+        return sorted({support_id for (support_id, _month), _metrics in rows})
+
+    @api.model
+    def _get_summary(self, support_ids):
+        """Return {support_id: {'latest': {...}, 'avg_3m': {...}, 'growth_pct': float}}.
+
+        `latest` holds the metrics of the most recent month, `avg_3m` the averages over
+        the last three recorded months and `growth_pct` the change in unique visitors
+        against the previous recorded month. Computed with one windowed query.
+        """
+        self.flush_model()
+        averages = SQL(', ').join(
+            SQL('AVG(%s) OVER last_3 AS %s', SQL.identifier(fname), SQL.identifier(f'avg_{fname}'))
+            for fname in METRIC_FIELDS
+        )
+        self.env.cr.execute(SQL(
+            """
+            SELECT * FROM (
+                SELECT m.*, %(averages)s,
+                       LAG(m.visitors_unique) OVER by_month AS previous_visitors,
+                       ROW_NUMBER() OVER (PARTITION BY m.support_id ORDER BY m.month DESC) AS row_rank
+                  FROM vendor_support_metric m
+                 WHERE m.support_id = ANY(%(support_ids)s)
+                WINDOW by_month AS (PARTITION BY m.support_id ORDER BY m.month),
+                       last_3 AS (PARTITION BY m.support_id ORDER BY m.month ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)
+            ) ranked
+             WHERE row_rank = 1
+            """,
+            averages=averages, support_ids=list(support_ids),
+        ))
+        summary = {}
+        for row in self.env.cr.dictfetchall():
+            previous = row['previous_visitors']
+            summary[row['support_id']] = {
+                'month': row['month'],
+                'latest': {fname: row[fname] for fname in METRIC_FIELDS},
+                'avg_3m': {fname: float(row[f'avg_{fname}'] or 0.0) for fname in METRIC_FIELDS},
+                'growth_pct': (
+                    (row['visitors_unique'] or 0) * 100.0 / previous - 100.0 if previous else 0.0
+                ),
+            }
+        return summary
+
+    @api.model
+    def _parse_rows(self, rows):
+        """Turn analytics export rows into (support_id, month, metrics) tuples.
+
+        Supports are matched on their id or name, resolved once for the whole file; a name
+        shared by several supports is rejected. Rows breaking the audience rules of the
+        support are rejected one by one. Returns (parsed rows, [(row number, error message)]).
+        """
+        supports_by_name = defaultdict(list)
+        for s in self.env['vendor.support'].search_read([], ['name']):
+            supports_by_name[s['name'].strip().lower()].append(s['id'])
+        support_ids = {sid for ids in supports_by_name.values() for sid in ids}
+        parsed, errors = [], []
+        for row_number, row in enumerate(rows, start=2):
+            row = {(key or '').strip().lower(): value for key, value in row.items()}
+            try:
+                support = str(row.get('support') or '').strip()
+                if support.isdigit() and int(support) in support_ids:
+                    support_id = int(support)
+                else:
+                    matches = supports_by_name.get(support.lower(), [])
+                    if len(matches) > 1:
+                        raise UserError(_("Plusieurs supports s'appellent « %s » : indiquez son identifiant.") % support)
+                    support_id = matches[0] if matches else False
+                if not support_id:
+                    raise UserError(_("Support introuvable : %s") % support)
+                month = row.get('month')
+                month = month.date() if hasattr(month, 'date') else fields.Date.to_date(
+                    str(month or '').strip()[:7] + '-01')
+                metrics = {}
+                for fname in METRIC_FIELDS:
+                    value = row.get(fname)
+                    if value in (None, ''):
+                        continue
+                    value = float(str(value).replace(' ', '').replace(',', '.').rstrip('%'))
+                    metrics[fname] = int(value) if fname in METRIC_INTEGER_FIELDS else value
+                self._check_row_metrics(metrics)
+            except (ValueError, UserError) as e:
+                errors.append((row_number, str(e)))
+                continue
+            parsed.append((support_id, month, metrics))
+        return parsed, errors
+
+    @api.model
+    def _check_row_metrics(self, metrics):
+        """Apply the audience rules of vendor.support to one imported row, so that a bad
+        row is rejected on its own instead of failing the whole import afterwards."""
+        for fname in METRIC_INTEGER_FIELDS:
+            if metrics.get(fname, 0) < 0:
+                raise UserError(_("%s ne peut pas être négatif.") % self._fields[fname].string)
+        for fname in METRIC_PERCENT_FIELDS:
+            if not 0.0 <= metrics.get(fname, 0.0) <= 100.0:
+                raise UserError(_("%s doit être compris entre 0 et 100.") % self._fields[fname].string)
+        mobile, desktop = metrics.get('seg_mobile_pct'), metrics.get('seg_desktop_pct')
+        if mobile and desktop and abs(mobile + desktop - 100.0) > SEGMENTATION_SUM_TOLERANCE:
+            raise UserError(_("Mobile + Desktop doivent totaliser environ 100 %% (%s + %s).") % (mobile, desktop))
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+import functools
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import SUPERUSER_ID, api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# System parameter: share of the calls that are timed, from 0 (disabled) to 1 (all calls)
+PERF_SAMPLE_RATE_PARAM = "vendor_supports.perf_sample_rate"
+# Seconds between two flushes of a worker's measures to vendor.support.perf.stat
+PERF_FLUSH_INTERVAL = 60
+# Days of measures kept
+PERF_RETENTION_DAYS = 30
+
+# Per worker measures not flushed yet: {db name: {method: {'calls': n, 'samples': [[ms, queries]]}}}
+_measures = defaultdict(lambda: defaultdict(lambda: {'calls': 0, 'samples': []}))
+_measures_lock = threading.Lock()
+_last_flush = {}
+
+
+def instrument(name=None):
+    """Count the calls of a model method and time a sample of them.
+
+    Disabled unless the `vendor_supports.perf_sample_rate` system parameter is set.
+    Measures (wall time, SQL queries) are kept in memory and written by the worker
+    itself, through its own cursor, every PERF_FLUSH_INTERVAL seconds.
+    """
+    def decorator(method):
+        key = name or method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            rate = _get_sample_rate(self.env)
+            if not rate:
+                return method(self, *args, **kwargs)
+            if random.random() >= rate:
+                _record(self.env, key)
+                return method(self, *args, **kwargs)
+
+            cr = self.env.cr
+            queries = cr.sql_log_count
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                _record(self.env, key, [
+                    round((time.perf_counter() - start) * 1000, 3),
+                    cr.sql_log_count - queries,
+                ])
+        return wrapper
+    return decorator
+
+
+def _get_sample_rate(env):
+    try:
+        return min(float(env['ir.config_parameter'].sudo().get_param(PERF_SAMPLE_RATE_PARAM) or 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+def _record(env, key, sample=None):
+    dbname = env.registry.db_name
+    with _measures_lock:
+        measure = _measures[dbname][key]
+        measure['calls'] += 1
+        if sample:
+            measure['samples'].append(sample)
+        now = time.monotonic()
+        due = now - _last_flush.setdefault(dbname, now) >= PERF_FLUSH_INTERVAL
+        if due:
+            _last_flush[dbname] = now
+            pending = _measures.pop(dbname)
+    if due:
+        _flush(env.registry, pending)
+
+
+def _flush(registry, pending):
+    """Write measures with a cursor of their own, outside the request transaction."""
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['vendor.support.perf.stat'].create([{
+                'method': method,
+                'calls': measure['calls'],
+                'sampled_calls': len(measure['samples']),
+                'samples': measure['samples'],
+            } for method, measure in pending.items()])
+    except Exception:
+        _logger.warning("vendor_supports: could not flush the performance measures", exc_info=True)
+
+
+class VendorSupportPerfStat(models.Model):
+    _name = 'vendor.support.perf.stat'
+    _description = 'Vendor Supports Method Measures'
+    _order = 'id desc'
+    _log_access = False
+
+    date = fields.Datetime('Date', default=fields.Datetime.now, required=True, index=True)
+    method = fields.Char('Méthode', required=True)
+    calls = fields.Integer('Appels')
+    sampled_calls = fields.Integer('Appels mesurés')
+    samples = fields.Json('Mesures', help="[duration in ms, SQL queries] of each sampled call.")
+
+    @api.autovacuum
+    def _gc_measures(self):
+        self.search([('date', '<', fields.Datetime.now() - timedelta(days=PERF_RETENTION_DAYS))]).unlink()
+
+
+class VendorSupportPerfReport(models.Model):
+    _name = 'vendor.support.perf.report'
+    _description = 'Vendor Supports Method Timings'
+    _auto = False
+    _rec_name = 'method'
+    _order = 'p95_ms desc'
+
+    method = fields.Char('Méthode', readonly=True)
+    calls = fields.Integer('Appels', readonly=True)
+    sampled_calls = fields.Integer('Appels mesurés', readonly=True)
+    avg_ms = fields.Float('Moyenne (ms)', aggregator='avg', readonly=True)
+    p50_ms = fields.Float('p50 (ms)', aggregator='max', readonly=True)
+    p95_ms = fields.Float('p95 (ms)', aggregator='max', readonly=True)
+    max_ms = fields.Float('Max (ms)', aggregator='max', readonly=True)
+    avg_queries = fields.Float('Requêtes SQL (moy.)', aggregator='avg', readonly=True)
+    p95_queries = fields.Float('Requêtes SQL (p95)', aggregator='max', readonly=True)
+    last_date = fields.Datetime('Dernière mesure', readonly=True)
+
+    def init(self):
+        self.env.cr.execute(SQL(
+            """
+            CREATE OR REPLACE VIEW %s AS (
+                WITH calls AS (
+                    SELECT method, SUM(calls) AS calls, SUM(sampled_calls) AS sampled_calls, MAX(date) AS last_date
+                      FROM vendor_support_perf_stat
+                  GROUP BY method
+                ), samples AS (
+                    SELECT st.method, (s.value->>0)::float AS ms, (s.value->>1)::float AS queries
+                      FROM vendor_support_perf_stat st
+                     CROSS JOIN LATERAL jsonb_array_elements(COALESCE(st.samples, '[]'::jsonb)) s
+                )
+                SELECT ROW_NUMBER() OVER (ORDER BY c.method) AS id,
+                       c.method, c.calls, c.sampled_calls, c.last_date,
+                       AVG(s.ms) AS avg_ms,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY s.ms) AS p50_ms,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.ms) AS p95_ms,
+                       MAX(s.ms) AS max_ms,
+                       AVG(s.queries) AS avg_queries,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.queries) AS p95_queries
+                  FROM calls c
+             LEFT JOIN samples s ON s.method = c.method
+              GROUP BY c.method, c.calls, c.sampled_calls, c.last_date
+            )
+            """,
+            SQL.identifier(self._table),
+        ))
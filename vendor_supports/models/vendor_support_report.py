@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+from .sale_order import SALE_ORDER_STATE
+
+
+class VendorSupportReport(models.Model):
+    """Business done through each support, per month.
+
+    Backed by a PostgreSQL materialized view so that dashboards never scan the order
+    lines; the view is refreshed concurrently by a scheduled action.
+    """
+    _name = 'vendor.support.report'
+    _description = 'Vendor Support Performance Analysis'
+    _auto = False
+    _rec_name = 'support_id'
+    _order = 'month desc'
+
+    month = fields.Date('Mois', readonly=True)
+    support_id = fields.Many2one('vendor.support', string='Support', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Fournisseur', readonly=True)
+    category_id = fields.Many2one('vendor.support.category', string='Catégorie', readonly=True)
+    company_id = fields.Many2one('res.company', string='Société', readonly=True)
+    state = fields.Selection(SALE_ORDER_STATE, string='État', readonly=True)
+    revenue = fields.Float('CA réservé', readonly=True)
+    purchase_cost = fields.Float("Coût d'achat", readonly=True)
+    margin = fields.Float('Marge', readonly=True)
+    avg_commission_pct = fields.Float('Commission moyenne (%)', aggregator='avg', readonly=True)
+    paid_qty = fields.Float('Quantité payante', readonly=True)
+    free_qty = fields.Float('Quantité gratuite', readonly=True)
+    order_count = fields.Integer('Commandes', readonly=True)
+    min_buy_breach_count = fields.Integer('Commandes sous Min Buy', readonly=True)
+    min_buy_breach_rate = fields.Float('Taux sous Min Buy (%)', aggregator='avg', readonly=True)
+
+    def _query(self):
+        # Free lines carry no support: they are attributed to the support of their paid line.
+        # Amounts are converted to company currency with the order rate, as in sale.report.
+        return SQL("""
+            SELECT MIN(l.id) AS id,
+                   date_trunc('month', so.date_order)::date AS month,
+                   vs.id AS support_id,
+                   vs.partner_id,
+                   vs.category_id,
+                   so.company_id,
+                   so.state,
+                   SUM(l.price_subtotal / r.rate) FILTER (WHERE NOT l.is_free_line) AS revenue,
+                   SUM(l.purchase_price * l.product_uom_qty / r.rate) FILTER (WHERE NOT l.is_free_line) AS purchase_cost,
+                   SUM((l.price_subtotal - l.purchase_price * l.product_uom_qty) / r.rate)
+                       FILTER (WHERE NOT l.is_free_line) AS margin,
+                   AVG(l.commission_pct) FILTER (WHERE NOT l.is_free_line) AS avg_commission_pct,
+                   SUM(l.product_uom_qty) FILTER (WHERE NOT l.is_free_line) AS paid_qty,
+                   SUM(l.product_uom_qty) FILTER (WHERE l.is_free_line) AS free_qty,
+                   COUNT(DISTINCT so.id) AS order_count,
+                   COUNT(DISTINCT so.id) FILTER (WHERE so.min_buy_status = 'not_reached') AS min_buy_breach_count,
+                   100.0 * COUNT(DISTINCT so.id) FILTER (WHERE so.min_buy_status = 'not_reached')
+                       / COUNT(DISTINCT so.id) AS min_buy_breach_rate
+              FROM sale_order_line l
+              JOIN sale_order so ON so.id = l.order_id
+         LEFT JOIN sale_order_line paid ON paid.id = l.support_bonus_of_id
+              JOIN vendor_support vs ON vs.id = COALESCE(l.support_id, paid.support_id)
+             CROSS JOIN LATERAL (SELECT COALESCE(NULLIF(so.currency_rate, 0), 1.0) AS rate) r
+             WHERE l.display_type IS NULL
+          GROUP BY date_trunc('month', so.date_order), vs.id, vs.partner_id, vs.category_id, so.company_id, so.state
+        """)
+
+    def init(self):
+        """(Re)create the view only when its definition changed: recreating it empties it
+        until the next refresh. The definition hash is kept as the view comment."""
+        query = self._query()
+        checksum = hashlib.sha256(repr((query.code, query.params)).encode()).hexdigest()
+        self.env.cr.execute(SQL(
+            "SELECT obj_description(to_regclass(%s), 'pg_class')", self._table,
+        ))
+        if self.env.cr.fetchone()[0] == checksum:
+            return
+
+        table = SQL.identifier(self._table)
+        self.env.cr.execute(SQL("DROP MATERIALIZED VIEW IF EXISTS %s", table))
+        self.env.cr.execute(SQL("CREATE MATERIALIZED VIEW %s AS (%s)", table, query))
+        self.env.cr.execute(SQL("COMMENT ON MATERIALIZED VIEW %s IS %s", table, checksum))
+        # A unique index is required to refresh the view concurrently
+        self.env.cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON %s (id)", SQL.identifier(f"{self._table}_id_uniq"), table,
+        ))
+
+    def _read_group_select(self, aggregate_spec, query):
+        # The rate of a group is taken from its summed counts: averaging the rates of the
+        # rows would weigh a month with one order like a month with a hundred.
+        if aggregate_spec == 'min_buy_breach_rate:avg':
+            return SQL(
+                "100.0 * SUM(%s) / NULLIF(SUM(%s), 0)",
+                self._field_to_sql(self._table, 'min_buy_breach_count', query),
+                self._field_to_sql(self._table, 'order_count', query),
+            )
+        return super()._read_group_select(aggregate_spec, query)
+
+    @api.model
+    def _cron_refresh(self):
+        """Refresh the figures without blocking the readers of the report."""
+        self.env.flush_all()
+        self.env.cr.execute(SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY %s", SQL.identifier(self._table)))
+        self.invalidate_model()
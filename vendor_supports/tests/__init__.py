@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from . import test_commission_recompute
+from . import test_free_lines
+from . import test_media_kit
+from . import test_metric_import
+from . import test_min_buy_status
+from . import test_min_buy_print
+from . import test_po_generation
+from . import test_product_import
+from . import test_support_search
+from . import test_query_plans
+from . import test_support_caches
+from . import test_support_report
+from . import test_performance
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import random
+
+
+class VendorSupportDataGenerator:
+    """Seed vendors, supports with free tiers, support products and quotations.
+
+    Every record type is created with one batched `create` so that seeding large
+    datasets stays fast; the same `seed` always produces the same dataset.
+    """
+
+    # Free goods granted from 10, 50 and 100 units
+    FREE_TIERS = ((10.0, 5.0), (50.0, 10.0), (100.0, 20.0))
+
+    def __init__(self, env, seed=42):
+        self.env = env
+        self.random = random.Random(seed)
+
+    def create_vendors(self, count):
+        return self.env['res.partner'].create([{
+            'name': f'Bench Vendor {i}',
+            'is_company': True,
+            'supplier_rank': 1,
+        } for i in range(count)])
+
+    def create_supports(self, vendors, per_vendor, commission_pct=20.0, minimum_buy_amount=0.0):
+        supports = self.env['vendor.support'].create([{
+            'name': f'{vendor.name} Support {i}',
+            'partner_id': vendor.id,
+            'url': f'https://support-{vendor.id}-{i}.example.com',
+            'commission_pct': commission_pct,
+            'minimum_buy_amount': minimum_buy_amount,
+        } for vendor in vendors for i in range(per_vendor)])
+        self.env['vendor.support.free.tier'].create([{
+            'support_id': support.id,
+            'min_qty': min_qty,
+            'free_percent': free_percent,
+        } for support in supports for min_qty, free_percent in self.FREE_TIERS])
+        return supports
+
+    def create_products(self, supports, per_support):
+        # product.template.create adds the vendor pricelist line of each product's support
+        return self.env['product.template'].create([{
+            'name': f'{support.name} Product {i}',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': self.random.choice((10.0, 25.0, 50.0, 100.0)),
+            'support_id': support.id,
+        } for support in supports for i in range(per_support)])
+
+    def prepare_line_vals(self, products, count):
+        lines = []
+        for template in self.random.sample(list(products), min(count, len(products))):
+            lines.append({
+                'product_id': template.product_variant_id.id,
+                'support_id': template.support_id.id,
+                'product_uom_qty': self.random.choice((5.0, 20.0, 60.0, 120.0)),
+                'price_unit': template.public_price,
+            })
+        return lines
+
+    def create_orders(self, customer, products, count, lines_per_order):
+        return self.env['sale.order'].create([{
+            'partner_id': customer.id,
+            'order_line': [(0, 0, vals) for vals in self.prepare_line_vals(products, lines_per_order)],
+        } for _i in range(count)])
+
+    def generate(self, vendors=5, supports_per_vendor=4, products_per_support=10, orders=10, lines_per_order=20):
+        vendor_records = self.create_vendors(vendors)
+        supports = self.create_supports(vendor_records, supports_per_vendor)
+        products = self.create_products(supports, products_per_support)
+        customer = self.env['res.partner'].create({'name': 'Bench Customer', 'is_company': True})
+        return {
+            'vendors': vendor_records,
+            'supports': supports,
+            'products': products,
+            'customer': customer,
+            'orders': self.create_orders(customer, products, orders, lines_per_order),
+        }
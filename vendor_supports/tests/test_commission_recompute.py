@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionRecompute(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env.company.approval_min_commission_pct = 15.0
+        vendor = cls.env['res.partner'].create({'name': 'Commission Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({
+            'name': 'Commission Support',
+            'partner_id': vendor.id,
+            'commission_pct': 20.0,
+        })
+        cls.product = product = cls.env['product.template'].create({
+            'name': 'Commission Product',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': 100.0,
+            'support_id': cls.support.id,
+        })
+        customer = cls.env['res.partner'].create({'name': 'Commission Customer'})
+        # Without a cost, the line falls back on the support commission
+        cls.order = cls.env['sale.order'].create({
+            'partner_id': customer.id,
+            'order_line': [(0, 0, {
+                'product_id': product.product_variant_id.id,
+                'support_id': cls.support.id,
+                'product_uom_qty': 1.0,
+                'price_unit': 100.0,
+                'purchase_price': 0.0,
+            })],
+        })
+        cls.line = cls.order.order_line.filtered(lambda l: not l.is_free_line)
+
+    def test_support_commission_updates_approval_level(self):
+        self.assertEqual(self.line.commission_pct, 20.0)
+        self.assertEqual(self.order.approval_required_level, 'n1')
+
+        self.support.write({'commission_pct': 10.0})
+        self.env.invalidate_all()
+
+        self.assertEqual(self.line.commission_pct, 10.0)
+        self.assertEqual(self.order.min_paid_commission_pct, 10.0)
+        self.assertEqual(self.order.approval_required_level, 'n2')
+
+    def test_deferred_recompute_updates_approval_level(self):
+        # Above the synchronous limit, the cron recomputes the lines by batches
+        with patch('odoo.addons.vendor_supports.models.vendor_support.COMMISSION_SYNC_LINE_LIMIT', 0):
+            self.support.write({'commission_pct': 10.0})
+        self.assertTrue(self.support.commission_recompute_pending)
+        self.assertEqual(self.order.approval_required_level, 'n1')
+
+        self.support._get_open_commission_lines()._recompute_commission_pct()
+        self.env.invalidate_all()
+
+        self.assertEqual(self.line.commission_pct, 10.0)
+        self.assertEqual(self.order.approval_required_level, 'n2')
+
+    def test_confirmed_line_is_frozen(self):
+        self.order.write({'state': 'sale'})
+        self.support.write({'commission_pct': 10.0})
+        # a recompute triggered by the line itself does not pick up the new support rate
+        self.line.write({'price_unit': 120.0})
+        self.env.invalidate_all()
+
+        self.assertEqual(self.line.commission_pct, 20.0)
+
+    def test_repricing_preview_before_apply(self):
+        self.support.auto_reprice = False
+        self.support.write({'commission_pct': 10.0})
+        self.assertEqual(self.product.standard_price, 80.0)
+
+        wizard = self.env['vendor.support.reprice'].with_context(
+            active_model='vendor.support', active_ids=self.support.ids).create({})
+        self.assertEqual(wizard.line_ids.product_tmpl_id, self.product)
+        self.assertEqual((wizard.line_ids.old_cost, wizard.line_ids.new_cost), (80.0, 90.0))
+
+        wizard.action_apply()
+        self.assertEqual(self.product.standard_price, 90.0)
+        self.assertEqual(len(self.support.price_log_ids), 1)
+
+    def test_repricing_ignores_differences_below_precision(self):
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE product_template SET standard_price = 80.0000001 WHERE id = %s", [self.product.id])
+        self.assertFalse(self.support._reprice_products(dry_run=True))
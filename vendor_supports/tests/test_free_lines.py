@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestFreeLines(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Free Goods Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({
+            'name': 'Free Goods Support',
+            'partner_id': vendor.id,
+            'free_tier_ids': [(0, 0, {'min_qty': 10.0, 'free_percent': 10.0})],
+        })
+        cls.product = cls.env['product.template'].create({
+            'name': 'Free Goods Product',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': 100.0,
+            'support_id': cls.support.id,
+        }).product_variant_id
+        cls.customer = cls.env['res.partner'].create({'name': 'Free Goods Customer'})
+
+    def _create_order(self, lines):
+        return self.env['sale.order'].create({
+            'partner_id': self.customer.id,
+            'order_line': [(0, 0, {
+                'product_id': self.product.id,
+                'support_id': self.support.id,
+                'product_uom_qty': qty,
+                'price_unit': 100.0,
+                'sequence': sequence,
+            }) for sequence, qty in lines],
+        })
+
+    def _layout(self, order):
+        lines = order.order_line.sorted(lambda l: (l.sequence, l.id))
+        return [(l.support_bonus_of_id or l, l.is_free_line) for l in lines]
+
+    def test_tied_sequences_renumber_order(self):
+        order = self._create_order([(10, 10.0), (10, 10.0)])
+        paid = order.order_line.filtered(lambda l: not l.is_free_line).sorted('id')
+
+        self.assertEqual(self._layout(order), [
+            (paid[0], False), (paid[0], True), (paid[1], False), (paid[1], True),
+        ])
+        self.assertEqual(sorted(order.order_line.mapped('sequence')), [10, 20, 30, 40])
+
+    def test_free_line_moved_out_of_its_gap(self):
+        order = self._create_order([(10, 10.0), (20, 1.0)])
+        paid = order.order_line.filtered(lambda l: not l.is_free_line).sorted('sequence')
+        free = order.order_line.filtered('is_free_line')
+        self.assertEqual(free.sequence, 11)
+
+        # dragged after the next line, then its paid line changes
+        free.sequence = 30
+        paid[0].product_uom_qty = 20.0
+
+        self.assertEqual(free.sequence, 11)
+        self.assertEqual(free.product_uom_qty, 2.0)
+        self.assertEqual(paid.mapped('sequence'), [10, 20])
+
+    def test_free_line_unlinked(self):
+        order = self._create_order([(10, 10.0), (20, 10.0)])
+        paid = order.order_line.filtered(lambda l: not l.is_free_line).sorted('sequence')
+
+        # below the tier, the free line goes and the others keep their sequence
+        paid[0].product_uom_qty = 5.0
+        self.assertEqual(self._layout(order), [(paid[0], False), (paid[1], False), (paid[1], True)])
+        self.assertEqual(order.order_line.sorted('sequence').mapped('sequence'), [10, 20, 21])
+
+        # removing a paid line removes its free line
+        paid[1].unlink()
+        self.assertEqual(order.order_line, paid[0])
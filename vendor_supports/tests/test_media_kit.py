@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestMediaKit(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Media Kit Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({'name': 'Media Kit Support', 'partner_id': vendor.id})
+
+    def test_clear_keeps_versions(self):
+        kit_v1 = base64.b64encode(b'media kit v1')
+        self.support.write({'media_kit': kit_v1, 'media_kit_filename': 'kit.pdf'})
+        self.support.write({'media_kit': base64.b64encode(b'media kit v2')})
+        self.assertEqual(self.support.current_media_kit_id.version, 2)
+
+        self.support.write({'media_kit': False})
+        self.assertFalse(self.support.current_media_kit_id)
+        self.assertFalse(self.support.media_kit)
+        self.assertEqual(sorted(self.support.media_kit_ids.mapped('version')), [1, 2])
+
+        # uploading again resumes the numbering after the kept versions
+        self.support.write({'media_kit': kit_v1})
+        self.assertEqual(self.support.current_media_kit_id.version, 3)
+        self.assertEqual(len(self.support.media_kit_ids), 3)
+
+    def test_download_url_quotes_filename(self):
+        self.support.write({'media_kit': base64.b64encode(b'media kit'), 'media_kit_filename': 'kit #1 ?.pdf'})
+        action = self.support.current_media_kit_id.action_download()
+        self.assertTrue(action['url'].endswith('/datas/kit%20%231%20%3F.pdf?download=true'))
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestMetricImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendors = cls.env['res.partner'].create([
+            {'name': 'Metric Vendor A', 'supplier_rank': 1},
+            {'name': 'Metric Vendor B', 'supplier_rank': 1},
+        ])
+        cls.support = cls.env['vendor.support'].create({'name': 'Metric Support', 'partner_id': vendors[0].id})
+        cls.env['vendor.support'].create([
+            {'name': 'Shared Name', 'partner_id': vendors[0].id},
+            {'name': 'Shared Name', 'partner_id': vendors[1].id},
+        ])
+
+    def test_invalid_rows_are_rejected_one_by_one(self):
+        Metric = self.env['vendor.support.metric']
+        rows, errors = Metric._parse_rows([
+            {'support': 'Metric Support', 'month': '2025-01', 'visitors_unique': '1000', 'bounce_rate': '40'},
+            {'support': 'Metric Support', 'month': '2025-02', 'bounce_rate': '140'},
+            {'support': 'Metric Support', 'month': '2025-03', 'seg_mobile_pct': '70', 'seg_desktop_pct': '70'},
+            {'support': 'Metric Support', 'month': '2025-04', 'visitors_unique': '-5'},
+            {'support': 'Shared Name', 'month': '2025-01', 'visitors_unique': '10'},
+        ])
+        self.assertEqual([row_number for row_number, _msg in errors], [3, 4, 5, 6])
+        self.assertEqual(len(rows), 1)
+
+        support_ids = Metric._upsert(rows)
+        self.env['vendor.support'].browse(support_ids)._apply_metrics()
+        self.assertEqual(self.support.visitors_unique, 1000)
+        self.assertEqual(self.support.bounce_rate, 40.0)
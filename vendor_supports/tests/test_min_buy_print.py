@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import json
+from urllib.parse import urlencode
+
+from odoo import http
+from odoo.tests import HttpCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestMinBuyPrint(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        customer = cls.env['res.partner'].create({'name': 'Print Customer'})
+        cls.valid, cls.blocked = cls.env['sale.order'].create([
+            {'partner_id': customer.id},
+            {'partner_id': customer.id},
+        ])
+        cls.blocked.write({'state': 'min_buy'})
+        cls.orders = cls.valid | cls.blocked
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate('admin', 'admin')
+
+    def _download(self, action):
+        """Download the report of `action` as the web client does.
+
+        The report URL is built from the action like the web client's getReportUrl: the
+        action `data` as query options when set, the active ids in the path otherwise.
+        Then it is posted to /report/download.
+        """
+        url = f"/report/pdf/{action['report_name']}"
+        context = action.get('context') or {}
+        if action.get('data'):
+            url += '?' + urlencode({'options': json.dumps(action['data']), 'context': json.dumps(context)})
+        elif context.get('active_ids'):
+            url += '/' + ','.join(str(docid) for docid in context['active_ids'])
+        return self.url_open('/report/download', data={
+            'data': json.dumps([url, 'qweb-pdf']),
+            'context': json.dumps({}),
+            'token': 'dummy',
+            'csrf_token': http.Request.csrf_token(self),
+        })
+
+    def test_print_valid_only_action(self):
+        action = self.env.ref('vendor_supports.action_print_min_buy_valid_quotations').with_context(
+            active_model='sale.order', active_ids=self.orders.ids,
+        ).run()
+        response = self._download(action)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.valid.name, response.text)
+        self.assertNotIn(self.blocked.name, response.text)
+
+    def test_print_blocked(self):
+        action = self.env.ref('sale.action_report_saleorder').report_action(self.orders)
+        response = self._download(action)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('Impression bloqu', response.text)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestMinBuyStatus(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Min Buy Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({'name': 'Min Buy Support', 'partner_id': vendor.id})
+        product = cls.env['product.template'].create({
+            'name': 'Min Buy Product',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': 100.0,
+            'support_id': cls.support.id,
+        })
+        customer = cls.env['res.partner'].create({'name': 'Min Buy Customer'})
+        cls.quote, cls.confirmed = cls.env['sale.order'].create([{
+            'partner_id': customer.id,
+            'order_line': [(0, 0, {
+                'product_id': product.product_variant_id.id,
+                'support_id': cls.support.id,
+                'product_uom_qty': 1.0,
+                'price_unit': 100.0,
+            })],
+        } for _i in range(2)])
+        cls.confirmed.write({'state': 'sale'})
+
+    def test_minimum_change_recomputes_open_quotes_only(self):
+        self.assertEqual((self.quote | self.confirmed).mapped('min_buy_status'), ['none', 'none'])
+
+        self.support.write({'minimum_buy_amount': 1000.0})
+        self.assertEqual(self.quote.min_buy_status, 'not_reached')
+        self.assertEqual(self.confirmed.min_buy_status, 'none')
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.product.models.product_product import ProductProduct
+from odoo.addons.purchase.models.purchase_order import PurchaseOrder
+
+
+@tagged('post_install', '-at_install')
+class TestPoGeneration(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company_b = cls.env['res.company'].create({'name': 'PO Generation Company B'})
+        cls.vendor_a, cls.vendor_b = cls.env['res.partner'].create([
+            {'name': 'PO Vendor A', 'is_company': True, 'supplier_rank': 1},
+            {'name': 'PO Vendor B', 'is_company': True, 'supplier_rank': 1},
+        ])
+        cls.support_a, cls.support_b = cls.env['vendor.support'].create([
+            {'name': 'PO Support A', 'partner_id': cls.vendor_a.id, 'commission_pct': 20.0},
+            {'name': 'PO Support B', 'partner_id': cls.vendor_b.id, 'commission_pct': 20.0},
+        ])
+        # product.template.create adds the vendor pricelist line of each product's support
+        cls.product_a, cls.product_b = cls.env['product.template'].create([{
+            'name': f'PO Product {support.name}',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': 100.0,
+            'support_id': support.id,
+        } for support in (cls.support_a, cls.support_b)])
+        cls.internal = cls.env['product.template'].create({
+            'name': 'PO Internal Product', 'type': 'service', 'product_kind': 'internal', 'list_price': 50.0,
+        })
+        customer = cls.env['res.partner'].create({'name': 'PO Customer', 'is_company': True})
+        date_order = '2025-03-01 10:00:00'
+
+        def line(template, support=False, qty=10.0):
+            return (0, 0, {
+                'product_id': template.product_variant_id.id,
+                'support_id': support and support.id,
+                'product_uom_qty': qty,
+                'price_unit': 100.0,
+            })
+
+        cls.orders = cls.env['sale.order'].with_context(no_free_goods=True).create([{
+            'partner_id': customer.id,
+            'date_order': date_order,
+            'order_line': [
+                line(cls.product_a, cls.support_a),
+                line(cls.product_b, cls.support_b),
+                line(cls.internal),
+            ],
+        }, {
+            'partner_id': customer.id,
+            'date_order': date_order,
+            'order_line': [line(cls.product_a, cls.support_a)],
+        }, {
+            'partner_id': customer.id,
+            'company_id': cls.company_b.id,
+            'order_line': [line(cls.product_a, cls.support_a)],
+        }])
+
+    def test_seller_cache(self):
+        first, second, _other_company = self.orders
+        lines = (first | second).order_line.filtered(lambda l: l.product_id == self.product_a.product_variant_id)
+        select_seller = ProductProduct._select_seller
+        cache = {}
+        with patch.object(ProductProduct, '_select_seller', autospec=True, side_effect=select_seller) as seller_mock:
+            results = [line.order_id._get_vendor_and_seller_for_line(line, cache) for line in lines]
+        # the same (product, vendor, qty, uom, date) key is resolved once
+        self.assertEqual(seller_mock.call_count, 1)
+        self.assertEqual([vendor for vendor, _seller in results], [self.vendor_a, self.vendor_a])
+
+    def test_confirm_generates_one_po_per_order_and_vendor(self):
+        button_confirm = PurchaseOrder.button_confirm
+        with patch.object(PurchaseOrder, 'button_confirm', autospec=True, side_effect=button_confirm) as confirm_mock:
+            self.orders.action_confirm()
+
+        # all the purchase orders are confirmed together
+        self.assertEqual(confirm_mock.call_count, 1)
+
+        pos = self.env['purchase.order'].search([('sale_id', 'in', self.orders.ids)])
+        self.assertEqual(len(pos), 4)
+        self.assertEqual(set(pos.mapped('state')), {'purchase'})
+        first, second, other_company = self.orders
+        self.assertEqual(
+            sorted(pos.filtered(lambda po: po.sale_id == first).partner_id.ids),
+            sorted((self.vendor_a | self.vendor_b).ids),
+        )
+        self.assertEqual(pos.filtered(lambda po: po.sale_id == second).partner_id, self.vendor_a)
+        self.assertEqual(pos.filtered(lambda po: po.sale_id == other_company).company_id, self.company_b)
+        # internal products are not bought
+        self.assertNotIn(self.internal.product_variant_id, pos.order_line.product_id)
+
+        so_line = first.order_line.filtered(lambda l: l.product_id == self.product_b.product_variant_id)
+        po_line = pos.order_line.filtered(lambda l: l.order_id.sale_id == first and l.support_id == self.support_b)
+        self.assertEqual(po_line.product_qty, 10.0)
+        self.assertEqual(po_line.price_unit, so_line.purchase_price)
+
+    def test_mark_done_keeps_attempts_per_job(self):
+        jobs = self.env['sale.order.po.job'].create([
+            {'sale_id': order.id, 'attempts': attempts, 'error': 'boom'}
+            for order, attempts in zip(self.orders, [0, 2, 0])
+        ])
+        jobs._mark_done()
+        self.assertEqual(jobs.mapped('attempts'), [1, 3, 1])
+        self.assertEqual(set(jobs.mapped('state')), {'done'})
+        self.assertFalse(any(jobs.mapped('error')))
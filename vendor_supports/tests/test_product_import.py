@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestProductImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendors = cls.env['res.partner'].create([
+            {'name': 'Import Vendor A', 'is_company': True, 'supplier_rank': 1},
+            {'name': 'Import Vendor B', 'is_company': True, 'supplier_rank': 1},
+        ])
+        cls.support_a, cls.support_b = cls.env['vendor.support'].create([
+            {'name': 'Homonym Support', 'partner_id': vendor.id} for vendor in vendors
+        ])
+
+    def test_ambiguous_support_name(self):
+        result = self.env['product.template']._import_support_products([
+            {'name': 'Homonym Product 1', 'support': 'Homonym Support', 'public_price': '100'},
+            {'name': 'Homonym Product 2', 'support': 'Homonym Support', 'vendor': 'Import Vendor B',
+             'public_price': '100'},
+        ])
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([row_number for row_number, _msg in result['errors']], [2])
+        product = self.env['product.template'].search([('name', '=', 'Homonym Product 2')])
+        self.assertEqual(product.support_id, self.support_b)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+from odoo.addons.vendor_supports.models.product_supplierinfo import VENDOR_SUPPORT_INDEX
+from odoo.addons.vendor_supports.models.product_template import ACTIVE_EXTERNAL_PRODUCTS_INDEX
+from odoo.addons.vendor_supports.models.sale_order import OPEN_QUOTE_STATES, SUPPORT_LINE_STATE_INDEX
+
+
+@tagged('post_install', '-at_install', 'vendor_supports_query_plans')
+class TestQueryPlans(TransactionCase):
+    """The hot domains of the module must be served by an index.
+
+    Sequential scans are disabled for the EXPLAIN so that the plans only depend on
+    which indexes exist, not on the (small) size of the test data: a domain that
+    falls back to a sequential scan here has lost its index.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Plan Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({'name': 'Plan Support', 'partner_id': cls.vendor.id})
+        cls.products = cls.env['product.template'].create([{
+            'name': f'Plan Product {i}',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': 100.0,
+            'support_id': cls.support.id,
+        } for i in range(20)])
+        cls.env.flush_all()
+        cls.env.cr.execute("ANALYZE product_supplierinfo, product_template, sale_order_line, purchase_order")
+
+    def _get_plan_nodes(self, model, domain):
+        """Return the (node type, relation, index name) of the EXPLAIN plan of a search."""
+        query = self.env[model].sudo()._search(domain)
+        self.env.cr.execute("SET LOCAL enable_seqscan = off")
+        try:
+            self.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+            plan = self.env.cr.fetchone()[0][0]['Plan']
+        finally:
+            self.env.cr.execute("SET LOCAL enable_seqscan = on")
+        nodes, stack = [], [plan]
+        while stack:
+            node = stack.pop()
+            nodes.append((node['Node Type'], node.get('Relation Name'), node.get('Index Name')))
+            stack.extend(node.get('Plans', []))
+        return nodes
+
+    def assertIndexScan(self, model, domain, table, indexes):
+        nodes = self._get_plan_nodes(model, domain)
+        seq_scans = [relation for node_type, relation, _index in nodes if node_type == 'Seq Scan']
+        self.assertNotIn(table, seq_scans, f"{model} {domain} scans {table} sequentially: {nodes}")
+        used = {index for _node_type, _relation, index in nodes if index}
+        self.assertTrue(used & set(indexes), f"{model} {domain} uses none of {indexes}: {nodes}")
+
+    def test_products_linked_to_support(self):
+        # action_product_linked_to_support, vendor.support._get_allowed_template_ids
+        self.assertIndexScan(
+            'product.template', [('seller_ids.support_id', '=', self.support.id)],
+            'product_supplierinfo', ['product_supplierinfo__support_id_index'],
+        )
+
+    def test_vendor_support_index(self):
+        # product.supplierinfo._get_vendor_support_index, used by the PO line support compute
+        self.assertIndexScan(
+            'product.supplierinfo', [('partner_id', '=', self.vendor.id), ('support_id', '!=', False)],
+            'product_supplierinfo', [VENDOR_SUPPORT_INDEX],
+        )
+
+    def test_active_external_products_of_support(self):
+        self.assertIndexScan(
+            'product.template', [('support_id', '=', self.support.id), ('product_kind', '=', 'external')],
+            'product_template', [ACTIVE_EXTERNAL_PRODUCTS_INDEX, 'product_template__support_id_index'],
+        )
+
+    def test_open_lines_of_support(self):
+        # vendor.support._get_open_commission_lines
+        self.assertIndexScan(
+            'sale.order.line', [('support_id', 'in', self.support.ids), ('state', 'in', OPEN_QUOTE_STATES)],
+            'sale_order_line', [SUPPORT_LINE_STATE_INDEX, 'sale_order_line__support_id_index'],
+        )
+
+    def test_purchase_orders_by_origin(self):
+        self.assertIndexScan(
+            'purchase.order', [('origin', '=', 'S00001')],
+            'purchase_order', ['purchase_order__origin_index'],
+        )
+
+    def test_purchase_orders_of_sale(self):
+        # sale.order._get_po, sale.order.action_open_purchase_order
+        self.assertIndexScan(
+            'purchase.order', [('sale_id', 'in', [1, 2])],
+            'purchase_order', ['purchase_order__sale_id_index'],
+        )
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestSupportCaches(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company_b = cls.env['res.company'].create({'name': 'Support Cache Company B'})
+        cls.vendor = cls.env['res.partner'].create({'name': 'Cache Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({'name': 'Cache Support', 'partner_id': cls.vendor.id})
+        cls.template = cls.env['product.template'].create({'name': 'Cache Product', 'type': 'service'})
+
+    def _add_pricelist_line(self, company):
+        return self.env['product.supplierinfo'].create({
+            'partner_id': self.vendor.id,
+            'product_tmpl_id': self.template.id,
+            'support_id': self.support.id,
+            'company_id': company.id,
+        })
+
+    def test_vendor_support_index(self):
+        SupplierInfo = self.env['product.supplierinfo'].with_context(allowed_company_ids=self.env.company.ids)
+        key = ('template', self.template.id)
+        self.assertNotIn(key, SupplierInfo._get_vendor_support_index(self.vendor.id))
+
+        # another company's pricelist stays out of the index
+        self._add_pricelist_line(self.company_b)
+        self.assertNotIn(key, SupplierInfo._get_vendor_support_index(self.vendor.id))
+
+        line = self._add_pricelist_line(self.env.company)
+        self.assertEqual(SupplierInfo._get_vendor_support_index(self.vendor.id)[key], {self.support.id})
+        self.assertIn(self.template.id, self.env['vendor.support']._get_allowed_template_ids(self.support.id))
+
+        line.unlink()
+        self.assertNotIn(key, SupplierInfo._get_vendor_support_index(self.vendor.id))
+
+    def test_archived_product_leaves_allowed_catalog(self):
+        self._add_pricelist_line(self.env.company)
+        Support = self.env['vendor.support']
+        self.assertIn(self.template.id, Support._get_allowed_template_ids(self.support.id))
+        self.template.active = False
+        self.assertNotIn(self.template.id, Support._get_allowed_template_ids(self.support.id))
+
+    def test_free_tier_change(self):
+        Support = self.env['vendor.support']
+        self.assertEqual(Support._get_free_tier_table(self.support.id), ((), ()))
+        tier = self.env['vendor.support.free.tier'].create({
+            'support_id': self.support.id, 'min_qty': 10.0, 'free_percent': 5.0,
+        })
+        self.assertEqual(Support._get_free_tier_table(self.support.id), ((10.0,), (5.0,)))
+        tier.free_percent = 20.0
+        self.assertEqual(Support._get_free_tier_table(self.support.id), ((10.0,), (20.0,)))
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestSupportReport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Report Vendor', 'supplier_rank': 1})
+        cls.support = cls.env['vendor.support'].create({
+            'name': 'Report Support',
+            'partner_id': vendor.id,
+            'minimum_buy_amount': 1000.0,
+        })
+        product = cls.env['product.template'].create({
+            'name': 'Report Product',
+            'type': 'service',
+            'product_kind': 'external',
+            'public_price': 100.0,
+            'support_id': cls.support.id,
+        })
+        customer = cls.env['res.partner'].create({'name': 'Report Customer'})
+        # January: one order of two under the minimum; February: one order, above it
+        cls.env['sale.order'].create([{
+            'partner_id': customer.id,
+            'date_order': date_order,
+            'order_line': [(0, 0, {
+                'product_id': product.product_variant_id.id,
+                'support_id': cls.support.id,
+                'product_uom_qty': 1.0,
+                'price_unit': price_unit,
+            })],
+        } for date_order, price_unit in [
+            ('2024-01-10', 500.0), ('2024-01-20', 2000.0), ('2024-02-10', 2000.0),
+        ]])
+
+    def test_breach_rate_from_summed_counts(self):
+        Report = self.env['vendor.support.report']
+        Report._cron_refresh()
+        [(rate,)] = Report._read_group(
+            [('support_id', '=', self.support.id)], aggregates=['min_buy_breach_rate:avg'])
+        # 1 order of 3, not the average of the monthly rates (50% and 0%)
+        self.assertAlmostEqual(rate, 100.0 / 3)
+
+    def test_init_keeps_unchanged_view(self):
+        Report = self.env['vendor.support.report']
+        Report._cron_refresh()
+        Report.init()
+        self.assertTrue(Report.search_count([('support_id', '=', self.support.id)]))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestSupportSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        vendor = cls.env['res.partner'].create({'name': 'Zephyr Media', 'supplier_rank': 1})
+        other = cls.env['res.partner'].create({'name': 'Other Vendor', 'supplier_rank': 1})
+        category = cls.env['vendor.support.category'].create({'name': 'Zephyr Network'})
+        Support = cls.env['vendor.support']
+        cls.by_name = Support.create({'name': 'Zephyr', 'partner_id': other.id})
+        cls.by_vendor = Support.create({'name': 'Vendor Site', 'partner_id': vendor.id})
+        cls.by_category = Support.create({'name': 'Category Site', 'partner_id': other.id, 'category_id': category.id})
+        cls.by_url = Support.create({'name': 'Url Site', 'partner_id': other.id, 'url': 'https://zephyr.example.com'})
+        cls.blacklisted = Support.create({'name': 'Zephyr Old', 'partner_id': other.id, 'blacklisted': True})
+        cls.unrelated = Support.create({'name': 'Unrelated', 'partner_id': other.id})
+
+    def test_name_search_matches_every_column(self):
+        if not self.env.registry.has_trigram:
+            self.skipTest("pg_trgm is not installed")
+        ids = [support_id for support_id, _name in self.env['vendor.support'].name_search('zephyr')]
+        self.assertEqual(set(ids), {self.by_name.id, self.by_vendor.id, self.by_category.id, self.by_url.id})
+        self.assertEqual(ids[0], self.by_name.id)
+
+    def test_search_box(self):
+        supports = self.env['vendor.support'].search([('search_text', 'ilike', 'zephyr')])
+        self.assertEqual(
+            supports, self.by_name | self.by_vendor | self.by_category | self.by_url | self.blacklisted)
+
+    def test_wildcards_match_literally(self):
+        underscore = self.env['vendor.support'].create({'name': 'Zephyr_Hub', 'partner_id': self.by_name.partner_id.id})
+        own = [('partner_id', '=', self.by_name.partner_id.id)]
+        self.assertEqual(self.env['vendor.support'].search(own + [('search_text', 'ilike', '_')]), underscore)
+        self.assertFalse(self.env['vendor.support'].search(own + [('search_text', 'ilike', '100%')]))
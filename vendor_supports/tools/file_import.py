@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+
+from odoo import _
+from odoo.exceptions import UserError
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+def read_rows(content, filename):
+    """Yield the rows of a CSV or XLSX file as {column: value} dicts, without loading the whole sheet."""
+    if (filename or '').lower().endswith('.xlsx'):
+        if openpyxl is None:
+            raise UserError(_("Le module Python 'openpyxl' est requis pour importer des fichiers XLSX."))
+        sheet = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        for values in rows:
+            if any(v not in (None, '') for v in values):
+                yield dict(zip(header, values))
+    else:
+        text = content.decode('utf-8-sig')
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.DictReader(io.StringIO(text), dialect=dialect)
@@ -1,2 +1,5 @@
 from . import bc_client
-from . import min_buy_wizard
\ No newline at end of file
+from . import min_buy_wizard
+from . import support_product_import
+from . import support_metric_import
+from . import support_reprice
@@ -7,18 +7,20 @@ class SaleMinBuyWizard(models.TransientModel):
     _name = 'sale.min.buy.wizard'
     _description = 'Validation Min Buy - Wizard'
 
-    sale_id = fields.Many2one('sale.order', required=True, ondelete='cascade')
+    sale_ids = fields.Many2many('sale.order', string="Commandes")
     errors_text = fields.Text(readonly=True)
     reason = fields.Text(string="Motif (optionnel)")
 
     def action_request_validation(self):
         self.ensure_one()
-        o = self.sale_id.sudo()
+        orders = self.sale_ids.sudo()
 
-        o.write({'state': 'min_buy'})
-        o.message_post(body=_("Validation Min Buy demandée.") + (
+        orders.write({'state': 'min_buy'})
+        body = _("Validation Min Buy demandée.") + (
             ("\n" + _("Motif : %s") % self.reason.strip()) if self.reason else ""
-        ))
+        )
+        for o in orders:
+            o.message_post(body=body)
 
         # Notify approvers
         """grp = self.env.ref(MIN_BUY_GROUP_XMLID, raise_if_not_found=False)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo import fields, models, _
+
+from ..tools import read_rows
+
+
+class SupportMetricImportWizard(models.TransientModel):
+    _name = 'vendor.support.metric.import'
+    _description = 'Wizard: Import Support Audience Metrics'
+
+    file = fields.Binary('Fichier', required=True,
+                         help="CSV or XLSX analytics export with the columns: support, month (YYYY-MM), "
+                              "visitors_unique, sessions_per_month, pageviews_per_month, "
+                              "avg_visit_duration, bounce_rate, seg_mobile_pct, seg_desktop_pct.")
+    filename = fields.Char('Nom du fichier')
+    chunk_size = fields.Integer('Taille des lots', default=1000)
+    result_text = fields.Text('Résultat', readonly=True)
+
+    def action_import(self):
+        self.ensure_one()
+        Metric = self.env['vendor.support.metric']
+        rows, errors = Metric._parse_rows(read_rows(base64.b64decode(self.file), self.filename))
+        support_ids = Metric._upsert(rows, chunk_size=max(self.chunk_size, 1))
+        self.env['vendor.support'].browse(support_ids)._apply_metrics()
+
+        lines = [_("%s mesure(s) importée(s) pour %s support(s).") % (len(rows), len(support_ids))]
+        if errors:
+            lines.append(_("%s ligne(s) rejetée(s) :") % len(errors))
+            lines += [_("Ligne %s : %s") % (row_number, msg) for row_number, msg in errors]
+        self.result_text = "\n".join(lines)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
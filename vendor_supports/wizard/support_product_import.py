@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo import api, fields, models, _
+
+from ..tools import read_rows
+
+
+class SupportProductImportWizard(models.TransientModel):
+    _name = 'vendor.support.product.import'
+    _description = 'Wizard: Import Support Products'
+
+    support_id = fields.Many2one('vendor.support', string='Support par défaut',
+                                 default=lambda self: self._default_support_id(),
+                                 help="Support used for the rows without a 'support' column.")
+    file = fields.Binary('Fichier', required=True,
+                         help="CSV or XLSX file with the columns: name, support, vendor, public_price, uom, "
+                              "product_kind, display_scope, valid_from, valid_to, default_code. "
+                              "The vendor column is only needed for support names used by several vendors.")
+    filename = fields.Char('Nom du fichier')
+    chunk_size = fields.Integer('Taille des lots', default=500)
+    result_text = fields.Text('Résultat', readonly=True)
+
+    @api.model
+    def _default_support_id(self):
+        if self.env.context.get('active_model') == 'vendor.support' and len(self.env.context.get('active_ids') or []) == 1:
+            return self.env.context['active_ids'][0]
+        return False
+
+    def _read_rows(self):
+        self.ensure_one()
+        return read_rows(base64.b64decode(self.file), self.filename)
+
+    def action_import(self):
+        self.ensure_one()
+        result = self.env['product.template']._import_support_products(
+            self._read_rows(),
+            default_support=self.support_id,
+            chunk_size=max(self.chunk_size, 1),
+            commit=True,
+        )
+        lines = [_("%s produit(s) créé(s).") % result['created']]
+        if result['errors']:
+            lines.append(_("%s ligne(s) rejetée(s) :") % len(result['errors']))
+            lines += [_("Ligne %s : %s") % (row_number, msg) for row_number, msg in result['errors']]
+        self.result_text = "\n".join(lines)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from odoo import Command, api, fields, models
+
+
+class SupportRepriceWizard(models.TransientModel):
+    _name = 'vendor.support.reprice'
+    _description = 'Wizard: Preview Support Product Repricing'
+
+    support_ids = fields.Many2many('vendor.support', string='Supports')
+    line_ids = fields.One2many('vendor.support.reprice.line', 'wizard_id', string='Produits')
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get('active_model') != 'vendor.support':
+            return res
+        supports = self.env['vendor.support'].browse(self.env.context.get('active_ids', []))
+        res['support_ids'] = [Command.set(supports.ids)]
+        res['line_ids'] = [Command.create({
+            'product_tmpl_id': row['product_tmpl_id'],
+            'support_id': row['support_id'],
+            'old_cost': row['old_cost'],
+            'new_cost': row['new_cost'],
+            'old_price': row['old_price'],
+            'new_price': row['new_price'],
+            'old_margin': row['old_margin'],
+            'new_margin': row['new_margin'],
+        }) for row in supports._reprice_products(dry_run=True)]
+        return res
+
+    def action_apply(self):
+        self.ensure_one()
+        self.support_ids._reprice_products()
+        return {'type': 'ir.actions.act_window_close'}
+
+
+class SupportRepriceWizardLine(models.TransientModel):
+    _name = 'vendor.support.reprice.line'
+    _description = 'Wizard: Support Product Repricing Line'
+
+    wizard_id = fields.Many2one('vendor.support.reprice', required=True, ondelete='cascade')
+    product_tmpl_id = fields.Many2one('product.template', string='Produit', readonly=True)
+    support_id = fields.Many2one('vendor.support', string='Support', readonly=True)
+    old_cost = fields.Float('Ancien coût', digits='Product Price', readonly=True)
+    new_cost = fields.Float('Nouveau coût', digits='Product Price', readonly=True)
+    old_price = fields.Float('Ancien prix', digits='Product Price', readonly=True)
+    new_price = fields.Float('Nouveau prix', digits='Product Price', readonly=True)
+    old_margin = fields.Float('Ancienne marge (%)', digits=(16, 2), readonly=True)
+    new_margin = fields.Float('Nouvelle marge (%)', digits=(16, 2), readonly=True)